@@ -9,13 +9,14 @@ from autogen_agentchat.tools import AgentTool
 from autogen_core.models import ModelInfo
 from autogen_ext.models.openai import OpenAIChatCompletionClient
 
-from utils.bots import display_chat_history
+from utils.bots import asset_stream, display_chat_history
 from utils.bots.ctx_mgr import CtxMgr
 from utils.function_call import (
     content_wordcloud,
     # mock_crawling_dcard_article_content,
     # mock_crawling_dcard_urls,
     query_top_k_match_contents,
+    query_top_k_match_contents_batch,
 )
 from utils.helpers import (
     error_badge,
@@ -90,7 +91,7 @@ def init_agents() -> None:
                 "./src/static/Matchmaker_Agent_Prompt.txt"
             ),
             description="A match maker agent that provides match suggestions based on user needs.",
-            tools=[query_top_k_match_contents],
+            tools=[query_top_k_match_contents, query_top_k_match_contents_batch],
         )
 
     if "head_assistant" not in st.session_state:
@@ -188,7 +189,10 @@ async def autogen_response_stream(task: str):
                     yield record_then_yield(badge_str)
 
                     if result.name == "content_wordcloud":
-                        st.markdown(result.content, unsafe_allow_html=True)
+                        # A reference to the stored word-cloud image
+                        full_response += f"\n\n{result.content}\n\n"
+                        for chunk in asset_stream(f"\n\n{result.content}\n\n"):
+                            yield chunk
             case "ToolCallSummaryMessage":
                 add_spinner("rethink", i18n("pets.chat.spinner.rethink_text"))
             case _:
@@ -196,7 +200,8 @@ async def autogen_response_stream(task: str):
 
 
 def chat_init() -> None:
-    st.chat_message("assistant").write_stream(autogen_response_stream("請自我介紹"))
+    with st.chat_message("assistant"):
+        st.write_stream(autogen_response_stream("請自我介紹"))
 
     st.session_state.team.reset()
 
@@ -214,7 +219,8 @@ def chat(prompt: str):
     st.chat_message("user", avatar=user_image).write(prompt)
     ctx_history.add_context({"role": "user", "content": prompt})
 
-    st.chat_message("assistant").write_stream(autogen_response_stream(prompt))
+    with st.chat_message("assistant"):
+        st.write_stream(autogen_response_stream(prompt))
 
 
 def chat_bot():
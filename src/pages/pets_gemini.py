@@ -1,22 +1,24 @@
-import os
-import time
-from collections import deque
+import json
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import streamlit as st
-from google import genai
 from google.genai import types
 
 from utils.bots import (
+    asset_stream,
     chat,
     display_chat_history,
+    join_text_parts,
 )
-from utils.bots.ctx_mgr import CtxMgr
+from utils.bots.ctx_mgr import CtxMgr, TokenBudgetCtxMgr
 from utils.function_call import (
     # cawling_dcard_urls,
     content_wordcloud,
     # crawling_dcard_article_content,
 )
+from utils.function_call.tool_executor import run_tool
+from utils.genai_client import get_genai_client
 from utils.helpers import (
     error_badge,
     info_badge,
@@ -30,7 +32,78 @@ from utils.i18n import i18n
 input_field_placeholder = i18n("pets.chat.input_placeholder")
 user_name = "Shihtl"
 ctx_history = CtxMgr("pets_gemini_history", [])
-ctx_content = CtxMgr("pets_gemini", deque(maxlen=10))
+# Function responses of past turns are cut to this many characters
+MAX_PAST_FUNC_RESPONSE_CHARS = 1000
+# Evicted turns are replaced by a recap of at most this many characters
+MAX_SUMMARY_CHARS = 2000
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+# Upper bound of the function calls of one model turn that are executed at once
+MAX_PARALLEL_FUNC_CALLS = 4
+
+
+def compact_content(content: types.Content) -> types.Content:
+    """
+    Truncate the function responses of a past turn; the model has already answered
+    with them.
+
+    Arguments:
+        content (types.Content): A content of a past turn
+
+    Returns:
+        types.Content: The content, with long function responses cut short
+    """
+    parts = []
+    for part in content.parts or []:
+        func_response = part.function_response
+        if func_response and func_response.response:
+            result = json.dumps(func_response.response, ensure_ascii=False, default=str)
+            if len(result) > MAX_PAST_FUNC_RESPONSE_CHARS:
+                n_cut = len(result) - MAX_PAST_FUNC_RESPONSE_CHARS
+                part = types.Part.from_function_response(
+                    name=func_response.name,
+                    response={
+                        "result": f"{result[:MAX_PAST_FUNC_RESPONSE_CHARS]}... "
+                        f"[{n_cut} characters truncated]"
+                    },
+                )
+        parts.append(part)
+    return content.model_copy(update={"parts": parts})
+
+
+def summarize_contents(contents: list[types.Content]) -> list[types.Content]:
+    """
+    Recap evicted turns in one user content: the start of every message and the
+    names of the called functions, without a round trip to the model.
+
+    Arguments:
+        contents (list[types.Content]): The evicted contents, oldest first
+
+    Returns:
+        list[types.Content]: The recap, or no content if there is nothing to recap
+    """
+    lines = []
+    for content in contents:
+        for part in content.parts or []:
+            if part.text and part.text.startswith(SUMMARY_PREFIX):
+                lines.append(part.text.removeprefix(SUMMARY_PREFIX))
+            elif part.text and part.text.strip():
+                lines.append(f"{content.role}: {' '.join(part.text.split())[:200]}")
+            elif part.function_call:
+                lines.append(f"{content.role} called {part.function_call.name}")
+
+    if not lines:
+        return []
+    summary = "\n".join(lines)[-MAX_SUMMARY_CHARS:]
+    return [
+        types.Content(
+            role="user", parts=[types.Part.from_text(text=SUMMARY_PREFIX + summary)]
+        )
+    ]
+
+
+ctx_content = TokenBudgetCtxMgr(
+    "pets_gemini", compact=compact_content, summarize=summarize_contents
+)
 
 
 def page_init() -> None:
@@ -120,7 +193,7 @@ def execute_func_call(func_call: types.FunctionCall) -> dict:
     Returns:
         dict: {
             "func_call": FunctionCall,
-            "status": "success" or "error",
+            "status": "success" or "error" (also on timeout),
             "result": Function result or error message
         }
     """
@@ -145,7 +218,9 @@ def execute_func_call(func_call: types.FunctionCall) -> dict:
             # )
         elif func_call.name == "content_wordcloud":
             func_call_result["status"] = "success"
-            func_call_result["result"] = content_wordcloud(**func_call.args)
+            # CPU-bound: tokenize and render in the process pool, so the other
+            # sessions are not blocked meanwhile
+            func_call_result["result"] = run_tool(content_wordcloud, func_call.args)
             func_call_result["display_result"] = True
         # XXX: Extension point for other function calls
         else:
@@ -181,13 +256,15 @@ def add_func_call_result(func_call_result: dict) -> None:
 def func_call_result_badge_stream(func_call_result: dict) -> Generator:
     """
     Stream a badge indicating function call success or error, character by
-    character.
+    character, followed by the function result if it should be displayed.
 
     Arguments:
-        func_call_result (dict): Contains "status" and "func_call" info.
+        func_call_result (dict): Contains "status", "func_call", "result" and
+                                 "display_result" info.
 
     Yields:
-        str: Characters forming the status badge message.
+        str | Callable[[], None]: Characters forming the status badge message, then
+                                  the result, see `asset_stream`.
     """
     func_call_msg_i18n_key = f"pets.chat.badge.func_call_{func_call_result['status']}"
     func_call_msg = i18n(func_call_msg_i18n_key).format(
@@ -201,15 +278,21 @@ def func_call_result_badge_stream(func_call_result: dict) -> Generator:
         yield from str_stream(success_badge(func_call_msg))
 
     if func_call_result["display_result"]:
-        st.markdown(func_call_result["result"], unsafe_allow_html=True)
+        # The result references its media by asset key, so it is small enough to keep
+        # in the streamed response (and thus in the chat history)
+        yield from asset_stream(f"\n\n{func_call_result['result']}\n\n")
 
 
 def gemini_function_calling(
     function_calls: list[types.FunctionCall],
 ) -> Generator:
     """
-    Process a list of function calls: execute each, stream its badge, then prompt for next
-    actions and continue with model response.
+    Process a list of function calls: execute them concurrently while reporting their
+    progress, stream their badges, then prompt for next actions and continue with model
+    response.
+
+    The results are added to the context and streamed in the order the model requested
+    the calls, whatever order they finish in.
 
     Arguments:
         function_calls (list[types.FunctionCall]): FunctionCall objects to process.
@@ -217,16 +300,36 @@ def gemini_function_calling(
     Yields:
         str: Characters of badge messages and subsequent model response.
     """
-    for func_call in function_calls:
-        spinner_func_call_text = i18n("pets.chat.spinner.func_call_text").format(
-            func_call_name=func_call.name
-        )
-
-        with st.spinner(spinner_func_call_text, show_time=True):
-            func_call_result = execute_func_call(func_call)
-            add_func_call_result(func_call_result)
-            time.sleep(1)  # Simulate some delay for the spinner
+    func_call_names = ", ".join(func_call.name for func_call in function_calls)
+    progress_bar = st.progress(
+        0.0,
+        text=i18n("pets.chat.spinner.func_call_text").format(
+            func_call_name=func_call_names
+        ),
+    )
 
+    func_call_results: list[dict] = [{}] * len(function_calls)
+    max_workers = min(len(function_calls), MAX_PARALLEL_FUNC_CALLS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(execute_func_call, func_call): i
+            for i, func_call in enumerate(function_calls)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            func_call_results[i] = future.result()
+            progress_bar.progress(
+                done / len(function_calls),
+                text=i18n("pets.chat.progress.func_call_done").format(
+                    func_call_name=function_calls[i].name,
+                    done=done,
+                    total=len(function_calls),
+                ),
+            )
+    progress_bar.empty()
+
+    for func_call_result in func_call_results:
+        add_func_call_result(func_call_result)
         yield from func_call_result_badge_stream(func_call_result)
 
     think_again_msg = i18n("pets.chat.badge.think_again")
@@ -256,8 +359,8 @@ def gemini_response_stream() -> Generator:
     Yields:
         str: Characters from the model's response and streams function call handling if needed.
     """
-    # connect to google server - gemini
-    client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    # connect to google server - gemini, reusing the pooled client of this API key
+    client = get_genai_client()
 
     function_calls = []
     this_response = ""
@@ -295,10 +398,8 @@ def chat_init(stream: Generator) -> None:
         )
     )
 
-    full_response = st.chat_message("assistant").write_stream(stream)
-
-    if isinstance(full_response, str):
-        full_response = [full_response]
+    with st.chat_message("assistant"):
+        full_response = join_text_parts(st.write_stream(stream))
 
     for response in full_response:
         ctx_history.add_context({"role": "assistant", "content": response})
@@ -1,64 +1,65 @@
 import numpy as np
 import plotly.graph_objs as go
 import streamlit as st
-from gensim.models import Word2Vec
-from gensim.utils import simple_preprocess
-from sklearn.decomposition import PCA
 
 from utils.helpers import color_map, st_spinner
 from utils.i18n import i18n
-from utils.week10 import build_corpus, df_input
+from utils.week10 import (
+    build_corpus,
+    df_input,
+    merged_sentence_lines,
+    projected_vectors,
+    projection_method_input,
+    sentence_word_colors,
+    sentence_word_indices,
+    tokenize_corpus,
+    train_word2vec,
+)
+
+# Above this many sentences, the sentence paths are merged into one trace per colour
+MAX_SENTENCE_LINE_TRACES = 100
 
 
 def page_init() -> None:
     st.title(i18n("week10.2d.doc_title"))
 
 
-def draw_2d(training_corpus: list) -> None:
-    spinner = st_spinner()
-
-    tokenized_sentences = [simple_preprocess(sentence) for sentence in training_corpus]
-    model = Word2Vec(
-        tokenized_sentences, vector_size=100, window=5, min_count=1, workers=4
-    )
-    word_vectors = np.array([model.wv[word] for word in model.wv.index_to_key])
-    pca = PCA(n_components=3)
-    reduced_vectors = pca.fit_transform(word_vectors)
-
-    word_colors = []
-    for word in model.wv.index_to_key:
-        for i, sentence in enumerate(tokenized_sentences):
-            if word in sentence:
-                word_colors.append(color_map[i % len(color_map)])
-                break
-
-    word_ids = [f"word-{i}" for i in range(len(model.wv.index_to_key))]
-
-    scatter = go.Scatter(
-        x=reduced_vectors[:, 0],
-        y=reduced_vectors[:, 1],
-        mode="markers+text",
-        text=model.wv.index_to_key,
-        textposition="top center",
-        marker={"color": word_colors, "size": 8},
-        customdata=word_colors,
-        ids=word_ids,
-        hovertemplate="Word: %{text}<br>Color: %{customdata}",
-    )
+def sentence_line_traces(
+    reduced_vectors: np.ndarray, sentence_indices: list[np.ndarray]
+) -> list:
+    """
+    Build the line traces of the sentence paths: one trace per sentence, or, above
+    MAX_SENTENCE_LINE_TRACES sentences, one WebGL trace per colour with the paths
+    separated by gaps, so the figure stays small and responsive.
+    """
+    if len(sentence_indices) > MAX_SENTENCE_LINE_TRACES:
+        n_colors = len(color_map)
+        return [
+            go.Scattergl(
+                x=line[:, 0],
+                y=line[:, 1],
+                mode="lines",
+                line={"color": color_map[group], "width": 1},
+                showlegend=True,
+                name=f"Sentences {group + 1}, {group + 1 + n_colors}, ...",
+                hoverinfo="skip",
+            )
+            for group, line in merged_sentence_lines(
+                reduced_vectors, sentence_indices, n_colors
+            ).items()
+        ]
 
     # Create line traces for each displayed sentence
-    display_array = [True for _ in range(len(tokenized_sentences))]
+    display_array = [True for _ in range(len(sentence_indices))]
 
     # Create line traces for each sentence
     line_traces = []
-    for i, sentence in enumerate(tokenized_sentences):
+    for i, indices in enumerate(sentence_indices):
         if display_array[i]:
-            line_vectors = [
-                reduced_vectors[model.wv.key_to_index[word]] for word in sentence
-            ]
+            line_vectors = reduced_vectors[indices]
             line_trace = go.Scatter(
-                x=[vector[0] for vector in line_vectors],
-                y=[vector[1] for vector in line_vectors],
+                x=line_vectors[:, 0],
+                y=line_vectors[:, 1],
                 mode="lines",
                 line={
                     "color": color_map[i % len(color_map)],
@@ -71,6 +72,48 @@ def draw_2d(training_corpus: list) -> None:
             )
             # Set different marker symbols for the start and end words
             line_traces.append(line_trace)
+    return line_traces
+
+
+def draw_2d(training_corpus: list, method: str = "pca") -> None:
+    spinner = st_spinner()
+
+    tokenized_sentences = tokenize_corpus(training_corpus)
+    model = train_word2vec(
+        tokenized_sentences,
+        # Update the model of the last run when sentences were only added
+        previous=st.session_state.get("word2vec_2d_corpus"),
+        vector_size=100,
+        window=5,
+        min_count=1,
+        workers=4,
+    )
+    st.session_state["word2vec_2d_corpus"] = tokenized_sentences
+    word_vectors = model.wv.vectors  # In index_to_key order
+    # Cached per model, computed in the background for the slow methods
+    reduced_vectors = projected_vectors(word_vectors, n_components=2, method=method)
+
+    # Each word takes the colour of the first sentence containing it
+    word_colors = sentence_word_colors(
+        tokenized_sentences, model.wv.key_to_index, color_map
+    )
+
+    word_ids = [f"word-{i}" for i in range(len(model.wv.index_to_key))]
+
+    scatter = go.Scatter(
+        x=reduced_vectors[:, 0],
+        y=reduced_vectors[:, 1],
+        mode="markers+text",
+        text=model.wv.index_to_key,
+        textposition="top center",
+        marker={"color": word_colors, "size": 8},
+        customdata=word_colors,
+        ids=word_ids,
+        hovertemplate="Word: %{text}<br>Color: %{customdata}",
+    )
+
+    sentence_indices = sentence_word_indices(tokenized_sentences, model.wv.key_to_index)
+    line_traces = sentence_line_traces(reduced_vectors, sentence_indices)
 
     fig = go.Figure(data=[scatter] + line_traces)
 
@@ -98,4 +141,4 @@ if __name__ == "__main__":
     if training_corpus == []:
         st.warning(i18n("week10.no_sentences"))
     else:
-        draw_2d(training_corpus)
+        draw_2d(training_corpus, projection_method_input())
@@ -1,36 +1,45 @@
-import numpy as np
 import plotly.graph_objs as go
 import streamlit as st
-from gensim.models import Word2Vec
-from gensim.utils import simple_preprocess
-from sklearn.decomposition import PCA
 
 from utils.helpers import color_map, st_spinner
 from utils.i18n import i18n
-from utils.week10 import build_corpus, df_input
+from utils.week10 import (
+    build_corpus,
+    df_input,
+    projected_vectors,
+    projection_method_input,
+    sentence_word_colors,
+    tokenize_corpus,
+    train_word2vec,
+)
 
 
 def page_init() -> None:
     st.title(i18n("week10.3d.doc_title"))
 
 
-def draw_3d(training_corpus: list) -> None:
+def draw_3d(training_corpus: list, method: str = "pca") -> None:
     spinner = st_spinner()
 
-    tokenized_sentences = [simple_preprocess(sentence) for sentence in training_corpus]
-    model = Word2Vec(
-        tokenized_sentences, vector_size=100, window=5, min_count=1, workers=4
+    tokenized_sentences = tokenize_corpus(training_corpus)
+    model = train_word2vec(
+        tokenized_sentences,
+        # Update the model of the last run when sentences were only added
+        previous=st.session_state.get("word2vec_3d_corpus"),
+        vector_size=100,
+        window=5,
+        min_count=1,
+        workers=4,
+    )
+    st.session_state["word2vec_3d_corpus"] = tokenized_sentences
+    word_vectors = model.wv.vectors  # In index_to_key order
+    # Cached per model, computed in the background for the slow methods
+    reduced_vectors = projected_vectors(word_vectors, n_components=3, method=method)
+
+    # Each word takes the colour of the first sentence containing it
+    word_colors = sentence_word_colors(
+        tokenized_sentences, model.wv.key_to_index, color_map
     )
-    word_vectors = np.array([model.wv[word] for word in model.wv.index_to_key])
-    pca = PCA(n_components=3)
-    reduced_vectors = pca.fit_transform(word_vectors)
-
-    word_colors = []
-    for word in model.wv.index_to_key:
-        for i, sentence in enumerate(tokenized_sentences):
-            if word in sentence:
-                word_colors.append(color_map[i % len(color_map)])
-                break
 
     # Create a 3D scatter plot using Plotly
     scatter = go.Scatter3d(
@@ -68,4 +77,4 @@ if __name__ == "__main__":
     if training_corpus == []:
         st.warning(i18n("week10.no_sentences"))
     else:
-        draw_3d(training_corpus)
+        draw_3d(training_corpus, projection_method_input())
@@ -1,46 +1,74 @@
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
 import pandas as pd
 import streamlit as st
-from gensim.models import Word2Vec
-from gensim.parsing.preprocessing import remove_stopwords
-from gensim.utils import simple_preprocess
+from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from utils.helpers import st_spinner
 from utils.i18n import i18n
-from utils.week10 import build_corpus, df_input
+from utils.week10 import (
+    CORPUS_FILE_ERRORS,
+    build_corpus,
+    corpus_file_input,
+    corpus_file_variants,
+    df_input,
+    tokenize_corpus,
+    train_word2vec_variants,
+)
+
+if TYPE_CHECKING:
+    from gensim.models import Word2Vec
 
 
 def page_init() -> None:
     st.title(i18n("week10.cbow.doc_title"))
 
 
-def train(training_corpus: list, is_remove_stopwords: bool) -> None:
+def train(variants: dict[str, Iterable[list[str]]]) -> dict[str, "Word2Vec"]:
     spinner = st_spinner()
+    progress_bar = st.progress(
+        0.0, text=i18n("week10.train_progress").format(percent=0)
+    )
 
-    # Preprocess the sentences
-    if is_remove_stopwords:
-        tokenized_sentences = [
-            simple_preprocess(remove_stopwords(sentence))
-            for sentence in training_corpus
-        ]
-    else:
-        tokenized_sentences = [
-            simple_preprocess(sentence) for sentence in training_corpus
-        ]
+    def show_progress(done: dict[str, float]) -> None:
+        fraction = sum(done.values()) / len(done)
+        progress_bar.progress(
+            fraction, text=i18n("week10.train_progress").format(percent=fraction * 100)
+        )
 
     word2vec_config = {
         "vector_size": 200,
         "window": 6,
         "min_count": 1,
-        "workers": 4,
         "sg": 0,
     }
 
-    # Train a skip-gram Word2Vec model
-    model = Word2Vec(tokenized_sentences, **word2vec_config)
-
-    spinner.end()
+    # Train both CBOW Word2Vec models at once, or reuse the ones trained on the
+    # same corpus
+    try:
+        results = train_word2vec_variants(
+            variants,
+            progress=show_progress,
+            # Update the models of the last run when sentences were only added
+            previous=st.session_state.get("word2vec_cbow_corpus"),
+            **word2vec_config,
+        )
+        st.session_state["word2vec_cbow_corpus"] = variants
+    finally:
+        progress_bar.empty()
+        spinner.end()
+
+    st.caption(
+        " · ".join(
+            i18n("week10.train_time").format(
+                model_name=i18n(f"week10.{name}_model"), seconds=seconds
+            )
+            for name, (_, seconds) in results.items()
+        )
+    )
 
-    return model
+    return {name: model for name, (model, _) in results.items()}
 
 
 def select_similar_word(options: list) -> str:
@@ -54,7 +82,7 @@ def select_similar_word(options: list) -> str:
     )
 
 
-def get_similar_words(model: Word2Vec, word: str) -> pd.DataFrame | None:
+def get_similar_words(model: "Word2Vec", word: str) -> pd.DataFrame | None:
     try:
         similar_words = model.wv.most_similar(word)
         df_similar_words = pd.DataFrame(similar_words, columns=["Word", "Similarity"])
@@ -82,15 +110,32 @@ def show_results(subheader: str, df_similar_words: pd.DataFrame | None) -> None:
     )
 
 
-def train_and_show(df: pd.DataFrame) -> None:
-    if (training_corpus := build_corpus(df)) == []:
+def train_and_show(df: pd.DataFrame, corpus_file: UploadedFile | None = None) -> None:
+    # An uploaded corpus is streamed from the file, taking precedence over the table
+    if corpus_file is not None:
+        try:
+            variants = corpus_file_variants(corpus_file)
+        except CORPUS_FILE_ERRORS as e:
+            st.error(i18n("week10.corpus_file.error").format(error=e))
+            return
+    elif training_corpus := build_corpus(df):
+        # Preprocess the sentences, with and without stopwords
+        variants = {
+            "original": tokenize_corpus(training_corpus),
+            "rm_stopwords": tokenize_corpus(training_corpus, is_remove_stopwords=True),
+        }
+    else:
+        variants = None
+
+    if variants is None:
         st.warning(i18n("week10.no_sentences"))
         return
 
-    models = {
-        "original": train(training_corpus, is_remove_stopwords=False),
-        "rm_stopwords": train(training_corpus, is_remove_stopwords=True),
-    }
+    try:
+        models = train(variants)
+    except CORPUS_FILE_ERRORS as e:
+        st.error(i18n("week10.corpus_file.error").format(error=e))
+        return
 
     st.subheader(i18n("week10.most_similar_words"))
 
@@ -111,5 +156,6 @@ if __name__ == "__main__":
     page_init()
 
     df = df_input()
+    corpus_file = corpus_file_input()
     st.divider()
-    train_and_show(df)
+    train_and_show(df, corpus_file)
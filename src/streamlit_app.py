@@ -1,3 +1,6 @@
+import os
+import threading
+
 import pandas as pd
 import streamlit as st
 
@@ -167,7 +170,42 @@ def setup_sidebar() -> None:
         )
 
 
+@st.cache_resource(show_spinner=False)
+def setup_warmup() -> None:
+    """
+    Start loading the CKIP models in the background, once per process.
+
+    `st.cache_resource` makes this run only for the first session of the process, so the
+    first word-cloud request finds the models already loaded. The word-cloud tool runs
+    in the tool worker processes, which then load the models themselves; the models
+    are only loaded in this process when the tools run inline
+    (`TOOL_PROCESS_WORKERS=0`). Set `CKIP_WARMUP=0` to disable it.
+
+    Returns:
+        None
+    """
+    if os.environ.get("CKIP_WARMUP", "1") == "0":
+        return
+
+    from utils.function_call import tool_executor
+
+    if tool_executor.TOOL_PROCESS_WORKERS > 0:
+        tool_executor.start_tool_workers()
+        return
+
+    def warm_up() -> None:
+        try:
+            from utils.function_call.wordcloud import warm_up_ckip_models
+
+            warm_up_ckip_models()
+        except Exception as e:
+            print(f"CKIP warm-up failed: {e}")
+
+    threading.Thread(target=warm_up, name="ckip-warmup", daemon=True).start()
+
+
 if __name__ == "__main__":
+    setup_warmup()
     setup_lang()
     setup_pages()
     setup_sidebar()
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import re
+import threading
+
+# Not under src/static: the assets are shown with st.image from their file, and static
+# serving stays off so the prompts and data files there are not public
+ASSET_DIR = os.environ.get("ASSET_DIR", "./.assets")
+
+# Total size of the stored assets, the least recently stored ones are deleted beyond it
+ASSET_MAX_MB = int(os.environ.get("ASSET_MAX_MB", 256))
+
+_ASSET_KEY_PATTERN = re.compile(r"[0-9a-f]{64}\.[a-z0-9]+")
+
+# "[alt]: asset:<key>", a markdown link reference definition: it renders as nothing, so
+# text streamed around it is unaffected, and `split_asset_refs` finds it to show the
+# image in its place
+_ASSET_REF_PATTERN = re.compile(
+    r"^\[([^\]\n]*)\]: asset:([0-9a-f]{64}\.[a-z0-9]+)[ \t]*$", re.MULTILINE
+)
+
+
+class AssetStore:
+    """
+    A content-addressed store for generated media files.
+
+    Each asset is written once under the SHA-256 of its bytes, so identical outputs
+    share one file, and it is referenced by a short key instead of inlining the bytes
+    into chat messages or model payloads.
+
+    The directory is bounded by `max_bytes`: storing an asset deletes the least
+    recently stored ones (by modification time, refreshed when an asset is stored
+    again) until the total fits.
+
+    Parameters:
+        root (str): Directory the assets are written to
+        max_bytes (int | None): Maximum total size of the assets, None for no bound
+    """
+
+    def __init__(
+        self, root: str = ASSET_DIR, max_bytes: int | None = ASSET_MAX_MB * 2**20
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _check_key(self, key: str) -> str:
+        if not _ASSET_KEY_PATTERN.fullmatch(key):
+            raise ValueError(f"Invalid asset key: {key}")
+        return key
+
+    def put(self, data: bytes, extension: str) -> str:
+        """
+        Store the bytes and return their asset key.
+
+        Arguments:
+            data (bytes): The file content
+            extension (str): File extension without the dot, e.g. "png"
+
+        Returns:
+            str: The asset key, "<sha256>.<extension>"
+        """
+        key = self._check_key(f"{hashlib.sha256(data).hexdigest()}.{extension}")
+        path = self.path(key)
+        with self._lock:
+            if not self._touch(path):
+                os.makedirs(self.root, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            self._evict(keep=key)
+        return key
+
+    @staticmethod
+    def _touch(path: str) -> bool:
+        # The directory is shared with other processes, which may delete the file
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _evict(self, keep: str) -> None:
+        if self.max_bytes is None:
+            return
+
+        files = []
+        for entry in os.scandir(self.root):
+            if _ASSET_KEY_PATTERN.fullmatch(entry.name):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime_ns, stat.st_size, entry.name))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.root, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def exists(self, key: str) -> bool:
+        """
+        Return whether the asset is stored.
+        """
+        return os.path.exists(self.path(key))
+
+    def path(self, key: str) -> str:
+        """
+        Return the file path of the asset.
+        """
+        return os.path.join(self.root, self._check_key(key))
+
+    def ref(self, key: str, alt: str = "") -> str:
+        """
+        Return the reference to the asset to put in markdown text, on its own line.
+        """
+        return f"[{alt}]: asset:{self._check_key(key)}"
+
+
+def split_asset_refs(text: str) -> list[str | tuple[str, str]]:
+    """
+    Split markdown text around its asset references, see `AssetStore.ref`.
+
+    Arguments:
+        text (str): Markdown text
+
+    Returns:
+        list[str | tuple[str, str]]: The text parts, and (alt, key) for each reference
+    """
+    parts = []
+    start = 0
+    for match in _ASSET_REF_PATTERN.finditer(text):
+        if text[start : match.start()].strip():
+            parts.append(text[start : match.start()])
+        parts.append((match.group(1), match.group(2)))
+        start = match.end()
+    if text[start:].strip():
+        parts.append(text[start:])
+    return parts
+
+
+asset_store = AssetStore()
@@ -1,4 +1,7 @@
 from .helpers import (
+    asset_stream,
     chat,
     display_chat_history,
+    join_text_parts,
+    markdown_with_assets,
 )
@@ -1,8 +1,13 @@
+import json
+import os
 from collections import deque
+from collections.abc import Callable
 from typing import Any
 
 import streamlit as st
 
+CTX_TOKEN_BUDGET = int(os.environ.get("CTX_TOKEN_BUDGET", 8000))
+
 
 class CtxMgr:
     def __init__(
@@ -44,3 +49,123 @@ class CtxMgr:
 
     def empty(self) -> bool:
         return len(st.session_state[self._name]) == 0
+
+
+def estimate_tokens(item: Any) -> int:
+    """
+    Roughly estimate the number of tokens of a context item.
+
+    Counts 4 UTF-8 bytes per token, i.e. about 1 token per 4 ASCII characters and
+    0.75 token per CJK character, which is close enough for budgeting.
+
+    Arguments:
+        item (Any): A pydantic model (e.g. `types.Content`), str or JSON-serializable value
+
+    Returns:
+        int: The estimated number of tokens, at least 1
+    """
+    if hasattr(item, "model_dump_json"):
+        text = item.model_dump_json(exclude_none=True)
+    elif isinstance(item, str):
+        text = item
+    else:
+        text = json.dumps(item, ensure_ascii=False, default=str)
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def is_turn_start(item: Any) -> bool:
+    """
+    Return whether the item starts a new conversation turn, i.e. it is a user message
+    that is not a function response.
+
+    Arguments:
+        item (Any): A `types.Content` or a {"role", "content"} dict
+
+    Returns:
+        bool: True for a user message
+    """
+    if isinstance(item, dict):
+        return item.get("role") == "user"
+    return getattr(item, "role", None) == "user" and not any(
+        part.function_response for part in item.parts or []
+    )
+
+
+class TokenBudgetCtxMgr(CtxMgr):
+    """
+    A context bounded by estimated tokens instead of number of items.
+
+    The items are grouped into turns, each starting at a user message (see
+    `is_turn_start`), so a function call is never separated from its response. When
+    the context exceeds `max_tokens`, the oldest turns are evicted as a whole (the
+    latest turn is always kept) and, if `summarize` is given, replaced by its summary
+    of them. When a new turn starts, the items of the previous turns are passed
+    through `compact`, e.g. to strip bulky tool payloads the model already used.
+
+    Parameters:
+        name (str): The name of the context in st.session_state
+        max_tokens (int): Token budget of the context
+        compact (Callable[[Any], Any] | None): Returns a smaller copy of an item of a past turn
+        summarize (Callable[[list], list] | None): Returns the items replacing the evicted items
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_tokens: int = CTX_TOKEN_BUDGET,
+        compact: Callable[[Any], Any] | None = None,
+        summarize: Callable[[list], list] | None = None,
+    ) -> None:
+        super().__init__(name, [])
+        # [item, estimated tokens] pairs
+        if not isinstance(st.session_state[self._name], list):
+            st.session_state[self._name] = []
+        self.max_tokens = max_tokens
+        self.compact = compact
+        self.summarize = summarize
+
+    @property
+    def _entries(self) -> list[list]:
+        return st.session_state[self._name]
+
+    def add_context(self, content: Any) -> None:
+        """
+        Append a content item, then evict the oldest turns exceeding the token budget.
+        """
+        if self.compact and is_turn_start(content):
+            for entry in self._entries:
+                entry[0] = self.compact(entry[0])
+                entry[1] = estimate_tokens(entry[0])
+
+        self._entries.append([content, estimate_tokens(content)])
+        self._fit_budget()
+
+    def _fit_budget(self) -> None:
+        evicted = []
+        while self.tokens() > self.max_tokens:
+            turn_starts = [
+                i for i, (item, _) in enumerate(self._entries) if is_turn_start(item)
+            ]
+            # The oldest turn ends where the second one starts; keep the latest turn
+            later_starts = [i for i in turn_starts if i > 0]
+            if not later_starts:
+                break
+            evicted.extend(item for item, _ in self._entries[: later_starts[0]])
+            del self._entries[: later_starts[0]]
+
+        if evicted and self.summarize:
+            self._entries[:0] = [
+                [item, estimate_tokens(item)] for item in self.summarize(evicted)
+            ]
+
+    def get_context(self) -> list:
+        """
+        Retrieve the current context items from st.session_state[self.ctx_name].
+        """
+        return [item for item, _ in self._entries]
+
+    def tokens(self) -> int:
+        """
+        Return the estimated number of tokens of the context.
+        """
+        return sum(tokens for _, tokens in self._entries)
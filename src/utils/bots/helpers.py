@@ -1,22 +1,126 @@
-from collections.abc import Generator
+import os
+from collections.abc import Callable, Generator
 
 import streamlit as st
 
+from utils.assets import asset_store, split_asset_refs
 from utils.bots.ctx_mgr import CtxMgr
+from utils.i18n import i18n
+
+# Number of latest messages rendered, and of earlier ones added per "load more" click
+CHAT_HISTORY_PAGE_SIZE = int(os.environ.get("CHAT_HISTORY_PAGE_SIZE", 20))
 
 
 def display_chat_history(
     ctx: CtxMgr,
     user_image: str = "https://www.w3schools.com/howto/img_avatar.png",
+    page_size: int = CHAT_HISTORY_PAGE_SIZE,
 ) -> None:
     """
-    Render past user and assistant messages from
+    Render the latest past user and assistant messages from
     st.session_state.history using Streamlit chat messages.
+
+    Only the last `page_size` messages are rendered, so a rerun costs the same however
+    long the session is; earlier messages are revealed a page at a time with a
+    "load more" button. The history is rendered in a fragment, so loading more only
+    reruns the history instead of the whole page.
+
+    Arguments:
+        ctx (CtxMgr): The chat history, {"role", "content"} dicts
+        user_image (str): Avatar of the user messages
+        page_size (int): Number of messages rendered per page
     """
+    n_shown_key = f"{ctx.name}_n_shown"
+    if n_shown_key not in st.session_state:
+        st.session_state[n_shown_key] = page_size
+
+    _chat_history_fragment(ctx, user_image, page_size, n_shown_key)
+
+
+@st.fragment
+def _chat_history_fragment(
+    ctx: CtxMgr, user_image: str, page_size: int, n_shown_key: str
+) -> None:
     histories = ctx.get_context()
-    for history in histories:
+    n_hidden = max(len(histories) - st.session_state[n_shown_key], 0)
+
+    if n_hidden:
+        st.button(
+            i18n("chat.history.load_more").format(count=min(n_hidden, page_size)),
+            key=f"{n_shown_key}_load_more",
+            icon=":material/expand_less:",
+            type="tertiary",
+            on_click=_show_more,
+            args=(n_shown_key, page_size),
+        )
+
+    for history in histories[n_hidden:]:
         avatar = user_image if history["role"] == "user" else None
-        st.chat_message(history["role"], avatar=avatar).markdown(history["content"])
+        with st.chat_message(history["role"], avatar=avatar):
+            markdown_with_assets(history["content"])
+
+
+def _asset_image(alt: str, key: str) -> None:
+    if asset_store.exists(key):
+        st.image(asset_store.path(key), caption=alt or None)
+    else:
+        # Deleted to keep the asset directory within its size cap
+        st.caption(i18n("chat.asset.missing").format(alt=alt))
+
+
+def markdown_with_assets(text: str) -> None:
+    """
+    Render markdown text, showing the images of its asset references (see
+    `AssetStore.ref`) in their place.
+
+    Arguments:
+        text (str): Markdown text
+    """
+    for part in split_asset_refs(text):
+        if isinstance(part, str):
+            st.markdown(part)
+        else:
+            _asset_image(*part)
+
+
+def asset_stream(text: str) -> Generator[str | Callable[[], None], None, None]:
+    """
+    Stream markdown text with st.write_stream, showing the images of its asset
+    references in their place.
+
+    The references are streamed too (they render as nothing), so the text
+    st.write_stream returns keeps them for the chat history.
+
+    Arguments:
+        text (str): Markdown text
+
+    Yields:
+        str | Callable[[], None]: The text, and a callable showing each image, which
+                                  st.write_stream calls instead of writing it
+    """
+    for part in split_asset_refs(text):
+        if isinstance(part, str):
+            yield part
+        else:
+            alt, key = part
+            yield f"\n\n{asset_store.ref(key, alt)}\n\n"
+            yield lambda alt=alt, key=key: _asset_image(alt, key)
+
+
+def _show_more(n_shown_key: str, page_size: int) -> None:
+    st.session_state[n_shown_key] += page_size
+
+
+def join_text_parts(full_response: str | list) -> list:
+    """
+    Return the messages of a st.write_stream response: the text parts split by the
+    images of `asset_stream` are joined back into one message.
+    """
+    if isinstance(full_response, str):
+        return [full_response]
+    if all(isinstance(response, str) for response in full_response):
+        return ["".join(full_response)]
+    return full_response
 
 
 def chat(ctx_history: CtxMgr, prompt: str, stream: Generator):
@@ -32,10 +136,11 @@ def chat(ctx_history: CtxMgr, prompt: str, stream: Generator):
     st.chat_message("user", avatar=user_image).write(prompt)
     ctx_history.add_context({"role": "user", "content": prompt})
 
-    full_response = st.chat_message("assistant").write_stream(stream)
+    # Inside the message, so the images of `asset_stream` are shown there too
+    with st.chat_message("assistant"):
+        full_response = st.write_stream(stream)
 
-    if isinstance(full_response, str):
-        full_response = [full_response]
+    full_response = join_text_parts(full_response)
 
     for response in full_response:
         ctx_history.add_context({"role": "assistant", "content": response})
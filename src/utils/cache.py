@@ -0,0 +1,241 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded least-recently-used cache shared across sessions.
+
+    Optionally, every entry is also written to `persist_dir` as a pickle file so it
+    survives process restarts; an entry evicted from memory is then reloaded from disk
+    on the next lookup.
+
+    Entries can also be bounded by total weight (e.g. bytes): `weigher` returns the
+    weight of a value and the least recently used entries are evicted while the sum
+    exceeds `max_weight`. A value heavier than `max_weight` is never kept in memory.
+
+    The persisted files are bounded by `max_disk_bytes`: once their total size exceeds
+    it, the least recently written or reloaded files are deleted, down to 90% of it.
+    The directory may be shared by several processes; each one deletes by the same
+    order.
+
+    Parameters:
+        max_entries (int): Maximum number of entries kept in memory
+        persist_dir (str | None): Directory to persist entries to, None to keep them in memory only
+        max_weight (int | None): Maximum total weight of the in-memory entries, None for no bound
+        weigher (Callable[[Any], int] | None): Returns the weight of a value, required with `max_weight`
+        max_disk_bytes (int | None): Maximum total size of the persisted files, None for no bound
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        persist_dir: str | None = None,
+        max_weight: int | None = None,
+        weigher: Callable[[Any], int] | None = None,
+        max_disk_bytes: int | None = None,
+    ) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_weight is not None and weigher is None:
+            raise ValueError("max_weight requires a weigher")
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.persist_dir = persist_dir
+        self.max_disk_bytes = max_disk_bytes
+        # Size of the persisted files, counted on the first write then tracked
+        self._disk_bytes: int | None = None
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._weights: dict[Hashable, int] = {}
+        self.weight = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _disk_path(self, key: Hashable) -> str:
+        digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.persist_dir, f"{digest}.pkl")
+
+    def _load_from_disk(self, key: Hashable) -> Any:
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return _MISSING
+        if stored_key != key:
+            return _MISSING
+        self._touch(self._disk_path(key))
+        return value
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _save_to_disk(self, key: Hashable, value: Any) -> None:
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((key, value), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to persist cache entry to {path}: {e}")
+            return
+
+        if self.max_disk_bytes is not None:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            else:
+                self._disk_bytes += os.path.getsize(path)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_from_disk(keep=path)
+
+    def _disk_files(self) -> list[tuple[int, int, str]]:
+        files = []
+        for entry in os.scandir(self.persist_dir):
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return files
+
+    def _evict_from_disk(self, keep: str) -> None:
+        # Re-counted, as other processes may have written or deleted files meanwhile
+        files = sorted(self._disk_files())
+        total = sum(size for _, size, _ in files)
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+    def _pop(self, key: Hashable) -> None:
+        del self._entries[key]
+        self.weight -= self._weights.pop(key, 0)
+
+    def _insert(self, key: Hashable, value: Any) -> None:
+        if key in self._entries:
+            self._pop(key)
+
+        weight = self.weigher(value) if self.weigher else 0
+        if self.max_weight is not None and weight > self.max_weight:
+            return
+
+        self._entries[key] = value
+        self._weights[key] = weight
+        self.weight += weight
+        while len(self._entries) > self.max_entries or (
+            self.max_weight is not None and self.weight > self.max_weight
+        ):
+            self._pop(next(iter(self._entries)))
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value of the key and mark it as recently used.
+
+        Arguments:
+            key (Hashable): The cache key
+            default (Any): Value returned on a miss
+
+        Returns:
+            Any: The cached value, or `default` if the key is not cached
+        """
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+            elif self.persist_dir:
+                value = self._load_from_disk(key)
+                if value is not _MISSING:
+                    self._insert(key, value)
+
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store the value under the key, evicting the least recently used entries.
+
+        Arguments:
+            key (Hashable): The cache key
+            value (Any): The value to cache
+        """
+        with self._lock:
+            self._insert(key, value)
+            if self.persist_dir:
+                self._save_to_disk(key, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value of the key, computing and caching it on a miss.
+
+        Arguments:
+            key (Hashable): The cache key
+            compute (Callable[[], Any]): Called without arguments to produce the value
+
+        Returns:
+            Any: The cached or freshly computed value
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """
+        Drop every in-memory entry and reset the counters. Persisted entries are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.weight = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Return the hit/miss counters and current size of the cache.
+
+        Returns:
+            dict: {"hits", "misses", "entries", "max_entries", "weight"}
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "weight": self.weight,
+        }
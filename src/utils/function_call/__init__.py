@@ -6,4 +6,5 @@ from .pets import (
     # mock_crawling_dcard_article_content,
     # mock_crawling_dcard_urls,
     query_top_k_match_contents,
+    query_top_k_match_contents_batch,
 )
@@ -0,0 +1,579 @@
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from .vector_search import IVFSearch, make_search_backend, search_backend_name
+
+ARTICLE_CONTENTS_PATH = "./src/static/article_contents.csv"
+ARTICLE_STORE_DIR = "./src/static/article_store"
+
+_META_COLUMNS = ["url", "title", "author", "content"]
+
+
+def file_signature(file_path: str) -> tuple[int, int]:
+    """
+    Return a cheap signature of a file that changes whenever the file is rewritten.
+
+    Arguments:
+        file_path (str): Path of the file
+
+    Returns:
+        tuple[int, int]: (mtime in nanoseconds, size in bytes)
+    """
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Compute the SHA-256 hex digest of a file, reading it in blocks.
+
+    Arguments:
+        file_path (str): Path of the file
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _parse_vector(raw) -> list | None:
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    if isinstance(raw, list | np.ndarray):
+        return raw
+    return None
+
+
+def _atomic_write(file_path: str, write) -> None:
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+    os.replace(tmp_path, file_path)
+
+
+class ArticleMetadata:
+    """
+    Columnar row metadata of an `ArticleIndex`.
+
+    `url`, `title` and `author` are kept as object arrays so a set of hits is gathered
+    with one `np.take` per column. Contents are either kept as a
+    list of str, or as a UTF-8 byte blob (usually memory-mapped) plus an offsets array
+    so only the requested rows are ever decoded.
+
+    Parameters:
+        urls (list[str]): URL of each row
+        titles (list[str]): Title of each row
+        authors (list[str]): Author of each row
+        contents (list[str] | None): Content of each row, if kept in memory
+        content_blob (np.ndarray | None): uint8 array of the concatenated UTF-8 contents
+        content_offsets (np.ndarray | None): (n + 1,) byte offsets of each content in the blob
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        titles: list[str],
+        authors: list[str],
+        contents: list[str] | None = None,
+        content_blob: np.ndarray | None = None,
+        content_offsets: np.ndarray | None = None,
+    ) -> None:
+        if contents is None and content_offsets is None:
+            raise ValueError("Either contents or content offsets must be given")
+        self.urls = np.asarray(urls, dtype=object)
+        self.titles = np.asarray(titles, dtype=object)
+        self.authors = np.asarray(authors, dtype=object)
+        self._contents = contents
+        self._content_blob = content_blob
+        self._content_offsets = content_offsets
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ArticleMetadata":
+        """
+        Build the metadata from a frame holding the url, title, author and content columns.
+        """
+        df = df[_META_COLUMNS].fillna("").astype(str)
+        return cls(
+            urls=df["url"].tolist(),
+            titles=df["title"].tolist(),
+            authors=df["author"].tolist(),
+            contents=df["content"].tolist(),
+        )
+
+    def content(self, idx: int) -> str:
+        """
+        Return the content of the given row.
+        """
+        if self._contents is not None:
+            return self._contents[idx]
+        start, end = self._content_offsets[idx], self._content_offsets[idx + 1]
+        if start == end:
+            return ""
+        return bytes(self._content_blob[start:end]).decode("utf-8")
+
+    def gather(self, indices: np.ndarray) -> dict[str, list[str]]:
+        """
+        Gather the url, title, author and content columns of the given rows.
+
+        Arguments:
+            indices (np.ndarray): Row indices to gather, in output order
+
+        Returns:
+            dict[str, list[str]]: One list per column, aligned with `indices`
+        """
+        return {
+            "url": np.take(self.urls, indices).tolist(),
+            "title": np.take(self.titles, indices).tolist(),
+            "author": np.take(self.authors, indices).tolist(),
+            "content": [self.content(idx) for idx in indices],
+        }
+
+
+class ArticleIndex:
+    """
+    In-memory cosine-similarity index over the vectorized article contents.
+
+    The embedding matrix is stored as L2-normalized float32 rows so a top-k query is
+    a single matrix-vector product.
+
+    Parameters:
+        matrix (np.ndarray): (n, dim) float32 matrix of L2-normalized embeddings
+        metadata (ArticleMetadata): Row metadata aligned with `matrix`
+        source_path (str): Path of the file the index was built from
+        signature (tuple[int, int]): `file_signature` of the source when it was loaded
+        source_hash (str): SHA-256 of the source when it was loaded
+        ivf_lists (dict[str, np.ndarray] | None): Trained IVF lists of `matrix`, see
+            `IVFSearch.lists`; None to train them when the IVF backend is built
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        metadata: ArticleMetadata,
+        source_path: str = "",
+        signature: tuple[int, int] = (0, 0),
+        source_hash: str = "",
+        ivf_lists: dict[str, np.ndarray] | None = None,
+    ) -> None:
+        self.matrix = matrix
+        self.metadata = metadata
+        self.source_path = source_path
+        self.signature = signature
+        self.source_hash = source_hash
+        self.ivf_lists = ivf_lists
+        self._backends = {}
+        self._backends_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        """
+        Return the embedding dimension of the index.
+        """
+        return self.matrix.shape[1]
+
+    @classmethod
+    def from_csv(cls, csv_path: str = ARTICLE_CONTENTS_PATH) -> "ArticleIndex":
+        """
+        Build the index from the article CSV, keeping only rows whose `vectorize` cell
+        holds a vector of the dominant embedding dimension.
+
+        Arguments:
+            csv_path (str): Path to the article CSV
+
+        Returns:
+            ArticleIndex: The built index
+
+        Raises:
+            ValueError: If the CSV holds no valid vectorized contents
+        """
+        signature = file_signature(csv_path)
+        source_hash = file_sha256(csv_path)
+
+        df = pd.read_csv(csv_path)
+        raw_vectors = [_parse_vector(x) for x in df["vectorize"].tolist()]
+
+        dims = Counter(len(vec) for vec in raw_vectors if vec is not None)
+        if not dims:
+            raise ValueError("No valid vectorized contents found in article contents")
+        dim = dims.most_common(1)[0][0]
+
+        valid_indices = [
+            i
+            for i, vec in enumerate(raw_vectors)
+            if vec is not None and len(vec) == dim
+        ]
+        matrix = np.array([raw_vectors[i] for i in valid_indices], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+
+        metadata = ArticleMetadata.from_frame(df.iloc[valid_indices])
+
+        return cls(
+            matrix,
+            metadata,
+            source_path=csv_path,
+            signature=signature,
+            source_hash=source_hash,
+        )
+
+    @classmethod
+    def from_store(cls, store_dir: str = ARTICLE_STORE_DIR) -> "ArticleIndex":
+        """
+        Load the index from a store written by `compile_article_store`.
+
+        The embedding matrix and the content blob are memory-mapped read-only, so
+        loading does not copy them and every process mapping the same store shares the
+        same pages.
+
+        Arguments:
+            store_dir (str): Directory of the compiled store
+
+        Returns:
+            ArticleIndex: The loaded index
+
+        Raises:
+            ValueError: If the store files are inconsistent with each other
+        """
+        with open(os.path.join(store_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        matrix = np.load(os.path.join(store_dir, "vectors.npy"), mmap_mode="r")
+        content_offsets = np.asarray(meta["content_offsets"], dtype=np.int64)
+
+        content_path = os.path.join(store_dir, "contents.bin")
+        if content_offsets[-1] > 0:
+            content_blob = np.memmap(content_path, dtype=np.uint8, mode="r")
+        else:
+            content_blob = np.empty(0, dtype=np.uint8)
+
+        if (
+            matrix.shape != (meta["count"], meta["dim"])
+            or len(content_offsets) != meta["count"] + 1
+            or content_blob.shape[0] != content_offsets[-1]
+        ):
+            raise ValueError(f"Article store in {store_dir} is inconsistent")
+
+        ivf_lists = None
+        if meta.get("ivf_lists"):
+            with np.load(os.path.join(store_dir, "ivf.npz")) as f:
+                ivf_lists = {name: f[name] for name in f.files}
+            # Checked now, so an inconsistent store is rejected before any query
+            IVFSearch.from_lists(matrix, ivf_lists)
+
+        metadata = ArticleMetadata(
+            urls=meta["url"],
+            titles=meta["title"],
+            authors=meta["author"],
+            content_blob=content_blob,
+            content_offsets=content_offsets,
+        )
+
+        return cls(
+            matrix,
+            metadata,
+            source_path=meta["source_path"],
+            signature=tuple(meta.get("source_signature", (0, 0))),
+            source_hash=meta["source_hash"],
+            ivf_lists=ivf_lists,
+        )
+
+    def save(self, store_dir: str = ARTICLE_STORE_DIR) -> None:
+        """
+        Write the index as a store loadable by `from_store`.
+
+        The store consists of `vectors.npy` (float32 matrix), `contents.bin` (UTF-8
+        contents back to back), `ivf.npz` (the IVF lists, if trained) and `meta.json`
+        (url/title/author columns, content offsets, the source signature and hash).
+        `meta.json` is written last, so a reader never sees a new manifest pointing at
+        old data.
+
+        Arguments:
+            store_dir (str): Directory to write the store to
+        """
+        os.makedirs(store_dir, exist_ok=True)
+
+        encoded = [self.metadata.content(i).encode("utf-8") for i in range(len(self))]
+        content_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=content_offsets[1:])
+
+        _atomic_write(
+            os.path.join(store_dir, "vectors.npy"),
+            lambda f: np.save(f, np.ascontiguousarray(self.matrix, dtype=np.float32)),
+        )
+        _atomic_write(
+            os.path.join(store_dir, "contents.bin"),
+            lambda f: f.writelines(encoded),
+        )
+        if self.ivf_lists is not None:
+            _atomic_write(
+                os.path.join(store_dir, "ivf.npz"),
+                lambda f: np.savez(f, **self.ivf_lists),
+            )
+
+        meta = {
+            "source_path": self.source_path,
+            "source_signature": list(self.signature),
+            "source_hash": self.source_hash,
+            "ivf_lists": self.ivf_lists is not None,
+            "count": len(self),
+            "dim": self.dim,
+            "url": self.metadata.urls.tolist(),
+            "title": self.metadata.titles.tolist(),
+            "author": self.metadata.authors.tolist(),
+            "content_offsets": content_offsets.tolist(),
+        }
+        _atomic_write(
+            os.path.join(store_dir, "meta.json"),
+            lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8")),
+        )
+
+    def normalize_query(self, query_vec) -> np.ndarray:
+        """
+        Convert the query to an L2-normalized float32 vector.
+
+        Arguments:
+            query_vec: Query embedding with the same dimension as the index
+
+        Returns:
+            np.ndarray: (dim,) normalized query
+
+        Raises:
+            ValueError: If the query dimension does not match the index
+        """
+        query = np.asarray(query_vec, dtype=np.float32)
+        if query.shape != (self.dim,):
+            raise ValueError(
+                "No valid vectorized contents found matching embedding dimension"
+            )
+        norm = np.linalg.norm(query)
+        if norm != 0:
+            query = query / norm
+        return query
+
+    def similarities(self, query_vec) -> np.ndarray:
+        """
+        Compute the cosine similarity between the query vector and every indexed row.
+
+        Arguments:
+            query_vec: Query embedding with the same dimension as the index
+
+        Returns:
+            np.ndarray: (n,) float32 similarities
+        """
+        return self.matrix @ self.normalize_query(query_vec)
+
+    def backend(self, name: str | None = None):
+        """
+        Return the search backend with the given name, building it on first use.
+
+        Arguments:
+            name (str | None): "exact" or "ivf"; None reads `ARTICLE_SEARCH_BACKEND`
+
+        Returns:
+            ExactSearch | IVFSearch: The backend over this index's matrix
+        """
+        name = search_backend_name(name)
+        with self._backends_lock:
+            if name not in self._backends:
+                backend = make_search_backend(name, self.matrix, self.ivf_lists)
+                if isinstance(backend, IVFSearch):
+                    self.ivf_lists = backend.lists()
+                self._backends[name] = backend
+            return self._backends[name]
+
+    def top_k(self, query_vec, k: int = 15, backend: str | None = None) -> list[dict]:
+        """
+        Return the k rows most similar to the query vector, best first.
+
+        Arguments:
+            query_vec: Query embedding
+            k (int): The number of results to return
+            backend (str | None): Search backend name, see `backend`
+
+        Returns:
+            list[dict]: url, title, author, content and similarity of each hit
+        """
+        query = self.normalize_query(query_vec)
+        indices, scores = self.backend(backend).search(query, k)
+        return self.hits(indices, scores)
+
+    def top_k_batch(
+        self, query_vecs, k: int = 15, backend: str | None = None
+    ) -> list[list[dict]]:
+        """
+        Return the k rows most similar to each query vector, scored together.
+
+        Arguments:
+            query_vecs: (m, dim) query embeddings
+            k (int): The number of results to return per query
+            backend (str | None): Search backend name, see `backend`
+
+        Returns:
+            list[list[dict]]: The hits of each query, in query order
+        """
+        queries = np.stack([self.normalize_query(q) for q in query_vecs])
+        return [
+            self.hits(indices, scores)
+            for indices, scores in self.backend(backend).search_batch(queries, k)
+        ]
+
+    def hits(self, indices: np.ndarray, scores: np.ndarray) -> list[dict]:
+        """
+        Materialize the given rows as result dicts.
+
+        Arguments:
+            indices (np.ndarray): Row indices, best first
+            scores (np.ndarray): Similarity of each row
+
+        Returns:
+            list[dict]: url, title, author, content and similarity of each hit
+        """
+        columns = self.metadata.gather(indices)
+        return [
+            {
+                "url": url,
+                "title": title,
+                "author": author,
+                "content": content,
+                "similarity": similarity,
+            }
+            for url, title, author, content, similarity in zip(
+                columns["url"],
+                columns["title"],
+                columns["author"],
+                columns["content"],
+                scores.tolist(),
+                strict=True,
+            )
+        ]
+
+
+_index_registry: dict[str, ArticleIndex] = {}
+_index_lock = threading.Lock()
+
+
+def compile_article_store(
+    csv_path: str = ARTICLE_CONTENTS_PATH, store_dir: str = ARTICLE_STORE_DIR
+) -> ArticleIndex:
+    """
+    Parse the article CSV once and write it as a memory-mappable store.
+
+    The IVF lists are trained here too, so switching to `ARTICLE_SEARCH_BACKEND=ivf`
+    does not train k-means when the app loads the store.
+
+    Arguments:
+        csv_path (str): Path to the article CSV
+        store_dir (str): Directory to write the store to
+
+    Returns:
+        ArticleIndex: The index that was written
+    """
+    index = ArticleIndex.from_csv(csv_path)
+    index.backend(IVFSearch.name)
+    index.save(store_dir)
+    return index
+
+
+def _source_signature(csv_path: str) -> tuple[int, int] | None:
+    try:
+        return file_signature(csv_path)
+    except FileNotFoundError:
+        return None
+
+
+def _load_article_index(csv_path: str, store_dir: str | None) -> ArticleIndex:
+    meta_path = os.path.join(store_dir, "meta.json") if store_dir else None
+    if meta_path is None or not os.path.exists(meta_path):
+        return ArticleIndex.from_csv(csv_path)
+
+    try:
+        index = ArticleIndex.from_store(store_dir)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable article store {store_dir}: {e}")
+        return ArticleIndex.from_csv(csv_path)
+
+    # The store is used as is without the CSV, and without hashing the CSV while it
+    # keeps the mtime and size it was compiled from
+    signature = _source_signature(csv_path)
+    if signature is None or signature == index.signature:
+        return index
+
+    if index.source_hash != file_sha256(csv_path):
+        print(f"Article store {store_dir} is stale, loading {csv_path} instead")
+        return ArticleIndex.from_csv(csv_path)
+
+    index.signature = signature
+    return index
+
+
+def get_article_index(
+    csv_path: str = ARTICLE_CONTENTS_PATH, store_dir: str | None = ARTICLE_STORE_DIR
+) -> ArticleIndex:
+    """
+    Return the process-wide index for the given CSV, building it on first use.
+
+    The index is shared by every Streamlit session. If a compiled store of the same
+    CSV exists in `store_dir`, it is memory-mapped instead of parsing the CSV, and the
+    CSV may then be missing. On each call (and when loading the store) the file's mtime
+    and size are checked; if they changed, the file is re-hashed and the index is
+    reloaded only when the content actually changed.
+
+    The `ARTICLE_SEARCH_BACKEND` backend is built while loading, so no query waits for
+    it (e.g. for the IVF training, when the store has no IVF lists).
+
+    Arguments:
+        csv_path (str): Path to the article CSV
+        store_dir (str | None): Directory of the compiled store, None to always parse the CSV
+
+    Returns:
+        ArticleIndex: The up-to-date index
+    """
+    key = os.path.abspath(csv_path)
+    with _index_lock:
+        index = _index_registry.get(key)
+        signature = _source_signature(csv_path)
+
+        if index is not None and signature in (None, index.signature):
+            return index
+
+        if index is not None and index.source_hash == file_sha256(csv_path):
+            index.signature = signature
+            return index
+
+        index = _load_article_index(csv_path, store_dir)
+        index.backend()
+        _index_registry[key] = index
+        print(f"Loaded article index: {len(index)} rows, dim={index.dim}")
+        return index
+
+
+def clear_article_index() -> None:
+    """
+    Drop every loaded index so the next `get_article_index` call rebuilds it.
+    """
+    with _index_lock:
+        _index_registry.clear()
+
+
+if __name__ == "__main__":
+    # Usage: PYTHONPATH=src python -m utils.function_call.article_index [csv_path] [store_dir]
+    import sys
+
+    compiled = compile_article_store(*sys.argv[1:3])
+    print(f"Compiled {len(compiled)} articles (dim={compiled.dim})")
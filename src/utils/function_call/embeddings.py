@@ -0,0 +1,102 @@
+import os
+import re
+import unicodedata
+
+import numpy as np
+
+from utils.cache import LRUCache
+from utils.genai_client import get_genai_client
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+QUERY_TASK_TYPE = "RETRIEVAL_QUERY"
+
+# Shared by every session; set QUERY_EMBEDDING_CACHE_DIR to also keep entries on disk
+query_embedding_cache = LRUCache(
+    max_entries=int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", 1024)),
+    persist_dir=os.environ.get("QUERY_EMBEDDING_CACHE_DIR") or None,
+    max_disk_bytes=int(os.environ.get("QUERY_EMBEDDING_CACHE_MAX_MB", 64)) * 2**20,
+)
+
+
+def normalize_query_text(query: str) -> str:
+    """
+    Normalize a query so near-identical phrasings share one cache entry.
+
+    Applies NFKC normalization (full-width to half-width, etc.), case folding and
+    whitespace collapsing.
+
+    Arguments:
+        query (str): The raw query
+
+    Returns:
+        str: The normalized query
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return re.sub(r"\s+", " ", query).strip()
+
+
+def _embed_config(task_type: str):
+    # Imported here: google.genai.types takes most of a second to import
+    from google.genai import types
+
+    return types.EmbedContentConfig(task_type=task_type)
+
+
+def embed_query(
+    query: str, model: str = EMBEDDING_MODEL, task_type: str = QUERY_TASK_TYPE
+) -> np.ndarray:
+    """
+    Embed the query with Gemini, reusing a cached embedding when possible.
+
+    Arguments:
+        query (str): The query string to embed
+        model (str): The embedding model
+        task_type (str): The embedding task type
+
+    Returns:
+        np.ndarray: (dim,) float32 embedding
+    """
+    key = (normalize_query_text(query), model, task_type)
+
+    def compute() -> np.ndarray:
+        client = get_genai_client()
+        result = client.models.embed_content(
+            model=model,
+            contents=key[0],
+            config=_embed_config(task_type),
+        )
+        return np.asarray(result.embeddings[0].values, dtype=np.float32)
+
+    return query_embedding_cache.get_or_compute(key, compute)
+
+
+def embed_queries(
+    queries: list[str], model: str = EMBEDDING_MODEL, task_type: str = QUERY_TASK_TYPE
+) -> np.ndarray:
+    """
+    Embed several queries, sending every uncached query in a single request.
+
+    Arguments:
+        queries (list[str]): The query strings to embed
+        model (str): The embedding model
+        task_type (str): The embedding task type
+
+    Returns:
+        np.ndarray: (len(queries), dim) float32 embeddings, in query order
+    """
+    keys = [(normalize_query_text(query), model, task_type) for query in queries]
+    embeddings = {key: query_embedding_cache.get(key) for key in dict.fromkeys(keys)}
+
+    missing = [key for key, value in embeddings.items() if value is None]
+    if missing:
+        client = get_genai_client()
+        result = client.models.embed_content(
+            model=model,
+            contents=[key[0] for key in missing],
+            config=_embed_config(task_type),
+        )
+        for key, embedding in zip(missing, result.embeddings, strict=True):
+            embeddings[key] = np.asarray(embedding.values, dtype=np.float32)
+            query_embedding_cache.put(key, embeddings[key])
+
+    return np.stack([embeddings[key] for key in keys])
@@ -1,24 +1,20 @@
-import json
-
 # import random
 # import time
 # from collections import defaultdict
-import os
 
-import numpy as np
 import pandas as pd
-from google import genai
-from google.genai import types
-
-# Calculate the cosine similarity between the query vector and each content vector
-from sklearn.metrics.pairwise import cosine_similarity
 
 # from selenium.webdriver.common.by import By
 # from seleniumbase import SB, Driver
 # from utils.helpers import mock_return, read_file_content
 # from utils.helpers import mock_return
+from utils.assets import asset_store
+
+from .article_index import get_article_index
+from .embeddings import embed_queries, embed_query
+
 # from .wordcloud import build_word_freq_dict, draw_wordcloud_cat, test_md_draw_wordcloud
-from .wordcloud import build_word_freq_dict, test_md_draw_wordcloud
+from .wordcloud import build_word_freq_dict, store_wordcloud
 
 # Dcard URL for "送養" topic
 ADOPTION_TAG_URL = "https://www.dcard.tw/topics/%E9%80%81%E9%A4%8A"
@@ -169,7 +165,8 @@ def content_wordcloud(contents: list[str]) -> str:
                                                 None for default behavior.
 
     Returns:
-        str: A html image string of the generated word cloud.
+        str: A reference to the generated word-cloud image (see
+             `AssetStore.ref`), followed by its most frequent words.
     """
     # mode = None
     # urls = cawling_dcard_urls()
@@ -183,7 +180,13 @@ def content_wordcloud(contents: list[str]) -> str:
     # if mode == "cat":
     #     res = draw_wordcloud_cat(word_freq)
     # elif mode == "normal" or mode is None:
-    res = test_md_draw_wordcloud(word_freq)
+    asset_key = store_wordcloud(word_freq)
+
+    # Only a short reference and the top words go to the chat history and the model
+    top_words = ", ".join(
+        f"{word} ({freq})" for word, freq in list(word_freq.items())[:20]
+    )
+    res = f"{asset_store.ref(asset_key, 'wordcloud')}\n\nTop words: {top_words}"
 
     return res
 
@@ -200,60 +203,33 @@ def query_top_k_match_contents(query: str, k: int = 15) -> list[dict]:
         list[dict]: A list of dictionaries containing the top k matching contents.
     """
 
-    client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    query_vec = embed_query(query)
 
-    result = client.models.embed_content(
-        model="models/text-embedding-004",
-        contents=query,
-        config=types.EmbedContentConfig(task_type="RETRIEVAL_QUERY"),
-    )
+    return get_article_index().top_k(query_vec, k=k)
 
-    query_vec = result.embeddings[0].values
 
-    # Load the CSV file containing the vectorized contents
-    df = pd.read_csv("./src/static/article_contents.csv")
+def query_top_k_match_contents_batch(
+    queries: list[str], k: int = 15
+) -> list[list[dict]]:
+    """
+    Queries the top k matching contents for several queries at once, e.g. one per pet
+    profile or user constraint.
 
-    # Extract and parse raw vectorized contents
-    raw_vectors = (
-        df["vectorize"]
-        .apply(lambda x: json.loads(x) if isinstance(x, str) else x)
-        .tolist()
-    )
+    Args:
+        queries (list[str]): The query strings to search for.
+        k (int): The number of top matching contents to return per query. Default is 15.
+
+    Returns:
+        list[list[dict]]: For each query, in order, a list of dictionaries containing its
+                          top k matching contents.
+    """
+
+    if not queries:
+        return []
+
+    query_vecs = embed_queries(queries)
 
-    # Filter valid vectors matching the query embedding dimension
-    valid_indices = [
-        i
-        for i, vec in enumerate(raw_vectors)
-        if isinstance(vec, list | np.ndarray) and len(vec) == len(query_vec)
-    ]
-    if not valid_indices:
-        raise ValueError(
-            "No valid vectorized contents found matching embedding dimension"
-        )
-    vectorized_contents = np.array([raw_vectors[i] for i in valid_indices], dtype=float)
-    print(f"Number of vectorized contents: {len(vectorized_contents)}")
-
-    # Compute cosine similarities
-    similarities = cosine_similarity([query_vec], vectorized_contents)[0]
-
-    # Get the indices of the top k most similar contents within filtered set
-    top_k_indices = similarities.argsort()[-k:][::-1]
-
-    # Retrieve the top k contents and their URLs using original dataframe indices
-    top_k_contents = []
-    for idx in top_k_indices:
-        orig_idx = valid_indices[idx]
-        top_k_contents.append(
-            {
-                "url": df.iloc[orig_idx]["url"],
-                "title": df.iloc[orig_idx]["title"],
-                "author": df.iloc[orig_idx]["author"],
-                "content": df.iloc[orig_idx]["content"],
-                "similarity": similarities[idx],
-            }
-        )
-
-    return top_k_contents
+    return get_article_index().top_k_batch(query_vecs, k=k)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any
+
+# Set to 0 to run the tools inline, in the calling thread
+TOOL_PROCESS_WORKERS = int(os.environ.get("TOOL_PROCESS_WORKERS", 2))
+TOOL_TIMEOUT_SECONDS = float(os.environ.get("TOOL_TIMEOUT_SECONDS", 300))
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+class ToolTimeoutError(TimeoutError):
+    """
+    Raised when a tool call does not finish within its timeout.
+    """
+
+
+def get_tool_pool() -> ProcessPoolExecutor:
+    """
+    Return the process-wide pool for CPU-bound tools, starting it on first use.
+
+    Workers are spawned rather than forked, so they do not inherit the threads and
+    locks of the Streamlit server. Each worker loads the CKIP models when it starts
+    (unless CKIP_WARMUP=0) and keeps them between calls.
+
+    Returns:
+        ProcessPoolExecutor: The shared pool, bounded by TOOL_PROCESS_WORKERS
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=TOOL_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def _init_worker() -> None:
+    # Load the CKIP models when the worker starts, not on its first word cloud
+    if os.environ.get("CKIP_WARMUP", "1") == "0":
+        return
+    try:
+        from utils.function_call.wordcloud import warm_up_ckip_models
+
+        warm_up_ckip_models()
+    except Exception as e:
+        print(f"CKIP warm-up failed: {e}")
+
+
+def _noop() -> None:
+    pass
+
+
+def start_tool_workers() -> None:
+    """
+    Start every worker of the shared pool without waiting for them, so they load their
+    models before the first tool call.
+    """
+    pool = get_tool_pool()
+    # The pool only starts a worker when a call finds none idle
+    for _ in range(TOOL_PROCESS_WORKERS):
+        pool.submit(_noop)
+
+
+def shutdown_tool_pool() -> None:
+    """
+    Shut down the shared pool, cancelling the calls that have not started yet.
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def submit_tool(func: Callable, kwargs: dict) -> Future:
+    """
+    Schedule the tool on the process pool.
+
+    Arguments:
+        func (Callable): A module-level (picklable) tool function
+        kwargs (dict): Keyword arguments of the call
+
+    Returns:
+        Future: The pending result; `cancel()` drops the call if it has not started
+    """
+    return get_tool_pool().submit(func, **kwargs)
+
+
+def run_tool(
+    func: Callable, kwargs: dict, timeout: float | None = TOOL_TIMEOUT_SECONDS
+) -> Any:
+    """
+    Run the tool on the process pool and wait for its result.
+
+    Waiting releases the GIL, so other sessions keep running meanwhile. With
+    TOOL_PROCESS_WORKERS=0 the tool runs inline and the timeout does not apply.
+
+    Arguments:
+        func (Callable): A module-level (picklable) tool function
+        kwargs (dict): Keyword arguments of the call
+        timeout (float | None): Seconds to wait, None to wait forever
+
+    Returns:
+        Any: The tool result
+
+    Raises:
+        ToolTimeoutError: If the tool does not finish in time. A call that has not
+                          started is cancelled; a running one finishes in its worker
+                          and its result is discarded.
+    """
+    if TOOL_PROCESS_WORKERS < 1:
+        return func(**kwargs)
+
+    future = submit_tool(func, kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError as e:
+        future.cancel()
+        raise ToolTimeoutError(
+            f"Tool {func.__name__} did not finish within {timeout} seconds"
+        ) from e
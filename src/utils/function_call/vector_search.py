@@ -0,0 +1,276 @@
+import os
+
+import numpy as np
+
+# "exact" for brute-force cosine, "ivf" for the approximate inverted-file index
+SEARCH_BACKEND_ENV = "ARTICLE_SEARCH_BACKEND"
+DEFAULT_SEARCH_BACKEND = "exact"
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the indices of the k largest scores, best first.
+
+    Uses `np.argpartition` to select the k candidates in O(n) and only sorts those,
+    instead of sorting the whole score vector.
+
+    Arguments:
+        scores (np.ndarray): (n,) scores
+        k (int): The number of indices to return
+
+    Returns:
+        np.ndarray: (min(k, n),) indices sorted by descending score
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+class ExactSearch:
+    """
+    Brute-force cosine search over L2-normalized rows.
+
+    Parameters:
+        matrix (np.ndarray): (n, dim) float32 matrix of L2-normalized embeddings
+    """
+
+    name = "exact"
+
+    def __init__(self, matrix: np.ndarray) -> None:
+        self.matrix = matrix
+
+    def search(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the indices and scores of the k rows most similar to the query.
+
+        Arguments:
+            query (np.ndarray): (dim,) L2-normalized query
+            k (int): The number of results to return
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Row indices and their scores, best first
+        """
+        scores = self.matrix @ query
+        indices = top_k_indices(scores, k)
+        return indices, scores[indices]
+
+    def search_batch(
+        self, queries: np.ndarray, k: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Search several queries with a single matrix-matrix product.
+
+        Arguments:
+            queries (np.ndarray): (m, dim) L2-normalized queries
+            k (int): The number of results to return per query
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: Row indices and scores of each query
+        """
+        scores = self.matrix @ queries.T
+        results = []
+        for column in scores.T:
+            indices = top_k_indices(column, k)
+            results.append((indices, column[indices]))
+        return results
+
+
+class IVFSearch:
+    """
+    Approximate cosine search with an inverted-file (IVF) index in pure NumPy.
+
+    Rows are clustered with spherical k-means into `n_lists` lists. A query is only
+    scored against the rows of the `n_probe` lists whose centroids are closest to it,
+    so a query costs roughly `n_probe / n_lists` of a brute-force pass.
+
+    Parameters:
+        matrix (np.ndarray): (n, dim) float32 matrix of L2-normalized embeddings
+        n_lists (int | None): Number of clusters, defaults to about sqrt(n)
+        n_probe (int): Number of clusters scored per query
+        n_iter (int): Number of k-means iterations
+        seed (int): Seed of the k-means initialization and training sample
+    """
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        n_lists: int | None = None,
+        n_probe: int = 16,
+        n_iter: int = 10,
+        seed: int = 0,
+    ) -> None:
+        n = matrix.shape[0]
+        if n_lists is None:
+            n_lists = int(np.sqrt(n))
+        self.n_lists = max(1, min(n_lists, n))
+        self.n_probe = n_probe
+        self.matrix = matrix
+
+        self.centroids = self._train_centroids(n_iter, seed)
+        assignments = self._assign(matrix)
+
+        # Rows grouped by list: list i holds rows order[offsets[i]:offsets[i + 1]]
+        self.order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    @classmethod
+    def from_lists(
+        cls, matrix: np.ndarray, lists: dict[str, np.ndarray], n_probe: int = 16
+    ) -> "IVFSearch":
+        """
+        Restore an index from the lists of a trained one, without training k-means.
+
+        Arguments:
+            matrix (np.ndarray): The (n, dim) matrix the lists were trained on
+            lists (dict[str, np.ndarray]): `lists()` of the trained index
+            n_probe (int): Number of clusters scored per query
+
+        Returns:
+            IVFSearch: The restored index
+
+        Raises:
+            ValueError: If the lists do not match the matrix
+        """
+        centroids, order, offsets = lists["centroids"], lists["order"], lists["offsets"]
+        if (
+            centroids.ndim != 2
+            or centroids.shape[1] != matrix.shape[1]
+            or order.shape != (matrix.shape[0],)
+            or offsets.shape != (centroids.shape[0] + 1,)
+            or offsets[-1] != matrix.shape[0]
+        ):
+            raise ValueError("IVF lists do not match the matrix")
+
+        index = cls.__new__(cls)
+        index.n_lists = centroids.shape[0]
+        index.n_probe = n_probe
+        index.matrix = matrix
+        index.centroids = centroids.astype(np.float32, copy=False)
+        index.order = order
+        index.offsets = offsets
+        return index
+
+    def lists(self) -> dict[str, np.ndarray]:
+        """
+        Return the trained centroids and lists, restorable with `from_lists`.
+        """
+        return {
+            "centroids": self.centroids,
+            "order": self.order,
+            "offsets": self.offsets,
+        }
+
+    def _assign(self, rows: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+        assignments = np.empty(rows.shape[0], dtype=np.intp)
+        for start in range(0, rows.shape[0], batch_size):
+            batch = np.asarray(rows[start : start + batch_size])
+            assignments[start : start + batch_size] = np.argmax(
+                batch @ self.centroids.T, axis=1
+            )
+        return assignments
+
+    def _train_centroids(self, n_iter: int, seed: int) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        n = self.matrix.shape[0]
+
+        # k-means on a bounded sample keeps training time independent of corpus size
+        sample_size = min(n, 256 * self.n_lists)
+        sample = np.asarray(self.matrix[np.sort(rng.choice(n, sample_size, False))])
+        centroids = sample[rng.choice(sample_size, self.n_lists, False)].copy()
+
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the previous centroid for lists that received no rows
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1
+            centroids = sums / norms
+
+        return centroids.astype(np.float32)
+
+    def search(self, query: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return the indices and scores of the (approximately) k most similar rows.
+
+        Arguments:
+            query (np.ndarray): (dim,) L2-normalized query
+            k (int): The number of results to return
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Row indices and their scores, best first
+        """
+        probe = top_k_indices(self.centroids @ query, self.n_probe)
+        candidates = np.concatenate(
+            [self.order[self.offsets[i] : self.offsets[i + 1]] for i in probe]
+        )
+        candidates.sort()
+
+        scores = np.asarray(self.matrix[candidates]) @ query
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+    def search_batch(
+        self, queries: np.ndarray, k: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Search several queries; each one probes its own lists.
+
+        Arguments:
+            queries (np.ndarray): (m, dim) L2-normalized queries
+            k (int): The number of results to return per query
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: Row indices and scores of each query
+        """
+        return [self.search(query, k) for query in queries]
+
+
+def make_search_backend(
+    name: str | None,
+    matrix: np.ndarray,
+    ivf_lists: dict[str, np.ndarray] | None = None,
+):
+    """
+    Build the search backend with the given name.
+
+    Arguments:
+        name (str | None): "exact" or "ivf"; None reads `ARTICLE_SEARCH_BACKEND`
+        matrix (np.ndarray): (n, dim) float32 matrix of L2-normalized embeddings
+        ivf_lists (dict[str, np.ndarray] | None): `IVFSearch.lists()` trained on the
+            matrix, None to train the IVF index
+
+    Returns:
+        ExactSearch | IVFSearch: The backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    name = search_backend_name(name)
+    if name == ExactSearch.name:
+        return ExactSearch(matrix)
+    if name == IVFSearch.name:
+        n_probe = int(os.environ.get("ARTICLE_IVF_NPROBE", 16))
+        if ivf_lists is not None:
+            return IVFSearch.from_lists(matrix, ivf_lists, n_probe=n_probe)
+        return IVFSearch(matrix, n_probe=n_probe)
+    raise ValueError(f"Unknown search backend: {name}")
+
+
+def search_backend_name(name: str | None = None) -> str:
+    """
+    Resolve the backend name, falling back to `ARTICLE_SEARCH_BACKEND` or "exact".
+    """
+    if name is None:
+        name = os.environ.get(SEARCH_BACKEND_ENV, DEFAULT_SEARCH_BACKEND)
+    return name.lower()
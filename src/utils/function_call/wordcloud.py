@@ -1,74 +1,275 @@
 import base64
+import hashlib
+import json
+import os
 import re
+import threading
 from collections import Counter
+from collections.abc import Generator, Iterable
 from io import BytesIO
-
-# import matplotlib.colors as mcolors
-import matplotlib.pyplot as plt
-
-# import numpy as np
-import torch
-from ckip_transformers.nlp import CkipPosTagger, CkipWordSegmenter
+from typing import TYPE_CHECKING
 
 # from matplotlib.figure import Figure
-# from PIL import Image
-# from scipy.ndimage import gaussian_gradient_magnitude
-# from wordcloud import ImageColorGenerator, WordCloud
-from wordcloud import WordCloud
-
-
-def build_word_freq_dict(content: str | list[str]) -> dict:
-    if isinstance(content, list):
-        content = " ".join(content)
-
-    # Text Cleaning
-    content = re.sub(r"\s+", "", content)  # Remove multiple spaces & newlines
-    content = re.sub(r"[^\w\s]", "", content)  # Remove punctuation
-
-    # Tokenization with CKIP tagger
-    device = 0 if torch.cuda.is_available() else -1
-    print(f"Using device: {'CUDA' if device == 0 else 'CPU'}")
-
-    # Initialize CKIP models with GPU acceleration if available
-    ws = CkipWordSegmenter(model="bert-base", device=device)
-    pos = CkipPosTagger(model="bert-base", device=device)
-
-    # Process the text with CKIP
-    ws_results = ws([content])  # No recommend_dictionary in newer versions
-    pos_results = pos(ws_results)
-
-    # Extract tokens and their POS tags
-    tokens = ws_results[0]  # Get the tokens from the first (and only) sentence
-    pos_tags = pos_results[0]  # Get the POS tags from the first sentence
-
-    # Extract nouns, verbs, and adjectives
-    desired_tags = {"Na", "Nb", "Nc", "VA", "VB", "VH", "VK", "VL"}
-    filtered_tokens = [
-        token
-        for token, tag in zip(tokens, pos_tags, strict=False)
-        if tag in desired_tags and len(token) >= 2
-    ]
-
-    # Remove Stopwords
-    stopwords = set(
-        """
-    我們 你們 他們 這個 那個 一個 這些 那些
-    沒有 因為 所以 但是 如果 然而 並且 至於 例如
-    或者 無論 既然 由於 儘管 雖然 因此 其中 向 當 從 以來 以至 以上 以及 並非 然後
-    而且 而已 或者 並未 既不 何況 不僅 而是 既然 既是 既不 不但 不過 不如 不僅 不僅僅
-    既而 就算 除非 不然 否則 或許 縱然 縱使 假如 假設 假若 儘管 縱令 若是 即便 雖說
-    雖然 只要 只有 盡管 即使 既是 就算 然而 儘管 可是 只是 但是 雖說 雖然 這樣 那樣
-    這麼 那麼 例如 所以 但是 需要 可以 都是 一直 一些 就是 只能 一定 完全 是否 不是
-    看到 非常 很多 之前 希望 需要 可能 知道 人 有
-    """.split()
+from PIL import Image
+
+from utils.assets import asset_store
+from utils.cache import LRUCache
+
+# torch + ckip_transformers, wordcloud and matplotlib take seconds to import, so they
+# are imported by the functions using them, on first use
+if TYPE_CHECKING:
+    from ckip_transformers.nlp import CkipPosTagger, CkipWordSegmenter
+    from wordcloud import WordCloud
+
+_ckip_models: "tuple[CkipWordSegmenter, CkipPosTagger] | None" = None
+_ckip_load_lock = threading.Lock()
+# The HF fast tokenizers inside the CKIP drivers must not be used concurrently
+_ckip_inference_lock = threading.Lock()
+
+
+def get_ckip_models() -> "tuple[CkipWordSegmenter, CkipPosTagger]":
+    """
+    Return the process-wide CKIP word segmenter and POS tagger, loading them on first use.
+
+    Loading is guarded by a lock, so concurrent sessions wait for a single load
+    instead of each reading the BERT models from disk.
+
+    Returns:
+        tuple[CkipWordSegmenter, CkipPosTagger]: The shared word segmenter and POS tagger
+    """
+    global _ckip_models
+
+    if _ckip_models is None:
+        with _ckip_load_lock:
+            if _ckip_models is None:
+                import torch
+                from ckip_transformers.nlp import CkipPosTagger, CkipWordSegmenter
+
+                device = 0 if torch.cuda.is_available() else -1
+                print(f"Using device: {'CUDA' if device == 0 else 'CPU'}")
+
+                # Initialize CKIP models with GPU acceleration if available
+                _ckip_models = (
+                    CkipWordSegmenter(model="bert-base", device=device),
+                    CkipPosTagger(model="bert-base", device=device),
+                )
+
+    return _ckip_models
+
+
+def warm_up_ckip_models() -> None:
+    """
+    Load the CKIP models and run them once, so the first word-cloud request does not
+    pay the model loading.
+    """
+    ws, pos = get_ckip_models()
+    with _ckip_inference_lock:
+        pos(ws(["暖機"], show_progress=False), show_progress=False)
+
+
+# Nouns, verbs, and adjectives
+DESIRED_POS_TAGS = {"Na", "Nb", "Nc", "VA", "VB", "VH", "VK", "VL"}
+
+STOPWORDS = set(
+    """
+我們 你們 他們 這個 那個 一個 這些 那些
+沒有 因為 所以 但是 如果 然而 並且 至於 例如
+或者 無論 既然 由於 儘管 雖然 因此 其中 向 當 從 以來 以至 以上 以及 並非 然後
+而且 而已 或者 並未 既不 何況 不僅 而是 既然 既是 既不 不但 不過 不如 不僅 不僅僅
+既而 就算 除非 不然 否則 或許 縱然 縱使 假如 假設 假若 儘管 縱令 若是 即便 雖說
+雖然 只要 只有 盡管 即使 既是 就算 然而 儘管 可是 只是 但是 雖說 雖然 這樣 那樣
+這麼 那麼 例如 所以 但是 需要 可以 都是 一直 一些 就是 只能 一定 完全 是否 不是
+看到 非常 很多 之前 希望 需要 可能 知道 人 有
+""".split()
+)
+
+# Number of sentences sent to CKIP per call
+CKIP_BATCH_SIZE = 64
+# Longer sentences are cut into chunks of this many characters, well below
+# the 512-token window of the BERT models
+MAX_SENTENCE_CHARS = 200
+
+_SENTENCE_DELIMITERS = re.compile(r"[。！？!?；;\n]+")
+
+
+def split_sentences(
+    content: str | list[str], max_chars: int = MAX_SENTENCE_CHARS
+) -> Generator[str, None, None]:
+    """
+    Split the contents into cleaned sentence chunks for CKIP.
+
+    Contents are split at sentence-ending punctuation and line breaks, then whitespace
+    and punctuation are removed and sentences longer than `max_chars` are cut.
+
+    Arguments:
+        content (str | list[str]): A content or a list of contents
+        max_chars (int): Maximum characters per chunk
+
+    Yields:
+        str: Non-empty sentence chunks
+    """
+    contents = [content] if isinstance(content, str) else content
+
+    for text in contents:
+        for sentence in _SENTENCE_DELIMITERS.split(text):
+            sentence = re.sub(r"\s+", "", sentence)  # Remove spaces & newlines
+            sentence = re.sub(r"[^\w\s]", "", sentence)  # Remove punctuation
+            for start in range(0, len(sentence), max_chars):
+                yield sentence[start : start + max_chars]
+
+
+def iter_batches(
+    sentences: Iterable[str], batch_size: int
+) -> Generator[list[str], None, None]:
+    """
+    Group the sentences into lists of at most `batch_size` items.
+    """
+    batch = []
+    for sentence in sentences:
+        batch.append(sentence)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def content_hash(content: str) -> str:
+    """
+    Return the SHA-256 hex digest of a content.
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def word_freq_hash(word_freq: dict) -> str:
+    """
+    Return a SHA-256 hex digest identifying a word frequency dictionary.
+    """
+    items = sorted(word_freq.items())
+    return content_hash(json.dumps(items, ensure_ascii=False))
+
+
+# On disk by default, so the tool worker processes share their entries; set to an
+# empty string to keep the caches in memory only (then per process)
+WORDCLOUD_CACHE_DIR = os.environ.get("WORDCLOUD_CACHE_DIR", "./.cache/wordcloud")
+# Per cache, the least recently used files are deleted beyond it
+WORDCLOUD_CACHE_MAX_BYTES = int(os.environ.get("WORDCLOUD_CACHE_MAX_MB", 256)) * 2**20
+
+
+def _cache_dir(name: str) -> str | None:
+    root = WORDCLOUD_CACHE_DIR
+    return os.path.join(root, name) if root else None
+
+
+# Token counts of each content, keyed by content hash. Shared by every session, so
+# repeated and overlapping sets of articles only tokenize the unseen ones.
+word_count_cache = LRUCache(
+    max_entries=int(os.environ.get("WORDCLOUD_CACHE_SIZE", 4096)),
+    persist_dir=_cache_dir("word_counts"),
+    max_disk_bytes=WORDCLOUD_CACHE_MAX_BYTES,
+)
+
+# Asset keys of rendered word clouds, keyed by `word_freq_hash` and render settings
+wordcloud_image_cache = LRUCache(
+    max_entries=4096,
+    persist_dir=_cache_dir("images"),
+    max_disk_bytes=WORDCLOUD_CACHE_MAX_BYTES,
+)
+
+
+def count_words(
+    contents: list[str],
+    batch_size: int = CKIP_BATCH_SIZE,
+    max_sentence_chars: int = MAX_SENTENCE_CHARS,
+) -> list[Counter]:
+    """
+    Count the nouns, verbs and adjectives of each content with CKIP.
+
+    Sentences of all contents are tokenized together in batches, and token counts are
+    accumulated batch by batch, so time grows linearly with the input and memory
+    stays bounded by the batch size.
+
+    Arguments:
+        contents (list[str]): The contents
+        batch_size (int): Number of sentences per CKIP call
+        max_sentence_chars (int): Maximum characters per sentence chunk
+
+    Returns:
+        list[Counter]: Word counts of each content, in order
+    """
+    # Tokenization with CKIP tagger, reusing the models loaded by this process
+    ws, pos = get_ckip_models()
+
+    word_counts = [Counter() for _ in contents]
+    sentences = (
+        (i, sentence)
+        for i, text in enumerate(contents)
+        for sentence in split_sentences(text, max_chars=max_sentence_chars)
     )
-
-    clean_tokens = [
-        word for word in filtered_tokens if word.strip() and word not in stopwords
-    ]
-
-    # Count Frequency & Select Top 150 Words
-    word_freq = Counter(clean_tokens)
+    for batch in iter_batches(sentences, batch_size):
+        owners = [i for i, _ in batch]
+        with _ckip_inference_lock:
+            ws_results = ws(
+                [sentence for _, sentence in batch],
+                batch_size=batch_size,
+                show_progress=False,
+            )
+            pos_results = pos(ws_results, batch_size=batch_size, show_progress=False)
+
+        for i, tokens, pos_tags in zip(owners, ws_results, pos_results, strict=True):
+            word_counts[i].update(
+                token
+                for token, tag in zip(tokens, pos_tags, strict=False)
+                if tag in DESIRED_POS_TAGS
+                and len(token) >= 2
+                and token.strip()
+                and token not in STOPWORDS
+            )
+
+    return word_counts
+
+
+def build_word_freq_dict(
+    content: str | list[str],
+    batch_size: int = CKIP_BATCH_SIZE,
+    max_sentence_chars: int = MAX_SENTENCE_CHARS,
+) -> dict:
+    """
+    Count the top 150 nouns, verbs and adjectives of the contents with CKIP.
+
+    Word counts are cached per content hash, so only contents not seen before are
+    tokenized (see `count_words`).
+
+    Arguments:
+        content (str | list[str]): A content or a list of contents
+        batch_size (int): Number of sentences per CKIP call
+        max_sentence_chars (int): Maximum characters per sentence chunk
+
+    Returns:
+        dict: Word to frequency of the 150 most frequent words
+    """
+    contents = [content] if isinstance(content, str) else content
+
+    keys = [(content_hash(text), max_sentence_chars) for text in contents]
+    texts = dict(zip(keys, contents, strict=True))
+    counts = {key: word_count_cache.get(key) for key in texts}
+
+    missing = [key for key, value in counts.items() if value is None]
+    if missing:
+        computed = count_words(
+            [texts[key] for key in missing],
+            batch_size=batch_size,
+            max_sentence_chars=max_sentence_chars,
+        )
+        for key, word_count in zip(missing, computed, strict=True):
+            counts[key] = word_count
+            word_count_cache.put(key, word_count)
+
+    word_freq = Counter()
+    for key in keys:
+        word_freq.update(counts[key])
+
+    # Select Top 150 Words
     top_dict = dict(word_freq.most_common(150))
     print(top_dict)
 
@@ -204,9 +405,34 @@ def build_word_freq_dict(content: str | list[str]) -> dict:
 #     return plt.gcf()
 
 
-def test_md_draw_wordcloud(word_freq: dict) -> str:
-    wordcloud = WordCloud(
-        font_path="./src/static/font/Noto_Sans_TC/static/NotoSansTC-Regular.ttf",
+WORDCLOUD_FONT_PATH = "./src/static/font/Noto_Sans_TC/static/NotoSansTC-Regular.ttf"
+
+# "pil" encodes the word-cloud raster directly, "matplotlib" draws it into a figure first
+WORDCLOUD_RENDERER = os.environ.get("WORDCLOUD_RENDERER", "pil")
+# "png" or "webp", with the quality used for WebP and the maximum width in pixels
+WORDCLOUD_IMAGE_FORMAT = os.environ.get("WORDCLOUD_IMAGE_FORMAT", "png")
+WORDCLOUD_IMAGE_QUALITY = int(os.environ.get("WORDCLOUD_IMAGE_QUALITY", 80))
+# 1000 px matches the size of the former 10x5 inch, 100 dpi matplotlib figure
+WORDCLOUD_MAX_WIDTH = int(os.environ.get("WORDCLOUD_MAX_WIDTH", 1000))
+
+
+def generate_wordcloud(
+    word_freq: dict, font_path: str | None = WORDCLOUD_FONT_PATH
+) -> "WordCloud":
+    """
+    Lay out the word cloud of the word frequencies.
+
+    Arguments:
+        word_freq (dict): Word to frequency
+        font_path (str | None): Font file, None for the WordCloud default font
+
+    Returns:
+        WordCloud: The generated word cloud
+    """
+    from wordcloud import WordCloud
+
+    return WordCloud(
+        font_path=font_path,
         width=1600,
         height=800,
         background_color="white",
@@ -217,15 +443,120 @@ def test_md_draw_wordcloud(word_freq: dict) -> str:
         collocations=False,
     ).generate_from_frequencies(word_freq)
 
-    plt.figure(figsize=(10, 5))
+
+def encode_wordcloud_image(
+    wordcloud: "WordCloud",
+    image_format: str = WORDCLOUD_IMAGE_FORMAT,
+    quality: int = WORDCLOUD_IMAGE_QUALITY,
+    max_width: int | None = WORDCLOUD_MAX_WIDTH,
+) -> bytes:
+    """
+    Encode the word-cloud raster straight from PIL, without a matplotlib figure.
+
+    Arguments:
+        wordcloud (WordCloud): The generated word cloud
+        image_format (str): "png" or "webp"
+        quality (int): WebP quality from 0 to 100
+        max_width (int | None): Downscale to at most this width, None to keep the full size
+
+    Returns:
+        bytes: The encoded image
+
+    Raises:
+        ValueError: If the image format is not supported
+    """
+    image = wordcloud.to_image()
+    if max_width is not None and image.width > max_width:
+        image = image.resize(
+            (max_width, round(image.height * max_width / image.width)),
+            Image.Resampling.LANCZOS,
+        )
+
+    buffer = BytesIO()
+    if image_format == "png":
+        image.save(buffer, format="PNG")
+    elif image_format == "webp":
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        raise ValueError(f"Unsupported word cloud image format: {image_format}")
+    return buffer.getvalue()
+
+
+def render_wordcloud_image(
+    word_freq: dict,
+    renderer: str = WORDCLOUD_RENDERER,
+    image_format: str = WORDCLOUD_IMAGE_FORMAT,
+    font_path: str | None = WORDCLOUD_FONT_PATH,
+) -> tuple[bytes, str]:
+    """
+    Render the word cloud of the word frequencies as an encoded image.
+
+    Arguments:
+        word_freq (dict): Word to frequency
+        renderer (str): "pil" to encode the raster directly, "matplotlib" for the figure path
+        image_format (str): "png" or "webp", only used by the "pil" renderer
+        font_path (str | None): Font file, None for the WordCloud default font
+
+    Returns:
+        tuple[bytes, str]: The encoded image and its format
+    """
+    wordcloud = generate_wordcloud(word_freq, font_path=font_path)
+    if renderer == "matplotlib":
+        return encode_wordcloud_figure(wordcloud), "png"
+    return encode_wordcloud_image(wordcloud, image_format=image_format), image_format
+
+
+def store_wordcloud(word_freq: dict) -> str:
+    """
+    Render the word cloud into the asset store, reusing a stored rendering of the same
+    word frequencies.
+
+    Arguments:
+        word_freq (dict): Word to frequency
+
+    Returns:
+        str: The asset key of the word-cloud image
+    """
+    cache_key = (word_freq_hash(word_freq), WORDCLOUD_RENDERER, WORDCLOUD_IMAGE_FORMAT)
+    asset_key = wordcloud_image_cache.get(cache_key)
+    if asset_key is None or not asset_store.exists(asset_key):
+        image, image_format = render_wordcloud_image(word_freq)
+        asset_key = asset_store.put(image, image_format)
+        wordcloud_image_cache.put(cache_key, asset_key)
+    return asset_key
+
+
+def encode_wordcloud_figure(wordcloud: "WordCloud") -> bytes:
+    """
+    Encode the word cloud as a PNG by drawing it into a matplotlib figure.
+
+    Arguments:
+        wordcloud (WordCloud): The generated word cloud
+
+    Returns:
+        bytes: The encoded PNG
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(10, 5))
     plt.imshow(wordcloud, interpolation="bilinear")
     plt.axis("off")
     plt.tight_layout(pad=0)
 
     figfile = BytesIO()
     plt.savefig(figfile, format="png")
-    figfile.seek(0)
-    figdata_png = base64.b64encode(figfile.getvalue())  # 将图片转为base64
+    plt.close(fig)  # Do not keep the figure alive in pyplot's global state
+    return figfile.getvalue()
+
+
+def test_md_draw_wordcloud(
+    word_freq: dict, font_path: str | None = WORDCLOUD_FONT_PATH
+) -> str:
+    wordcloud = generate_wordcloud(word_freq, font_path=font_path)
+
+    figdata_png = base64.b64encode(
+        encode_wordcloud_figure(wordcloud)
+    )  # 将图片转为base64
     figdata_str = str(figdata_png, "utf-8")  # 提取base64的字符串，不然是b'xxx'
 
     return f'<img class="wordcloud" src="data:image/png;base64,{figdata_str}"/>'
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+from collections.abc import Callable, Iterator
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+# google.genai.types takes most of a second to import; only import it when needed
+if TYPE_CHECKING:
+    from google.genai import types
+
+# "gemini" for the real API, "stub" for the offline stand-in below
+CLIENT_BACKEND_ENV = "GEMINI_CLIENT_BACKEND"
+
+
+class _StubModels:
+    def __init__(self, embedding_dim: int) -> None:
+        self._embedding_dim = embedding_dim
+
+    def _embed(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8])
+        vec = np.random.default_rng(seed).standard_normal(self._embedding_dim)
+        return (vec / np.linalg.norm(vec)).tolist()
+
+    def embed_content(
+        self, model: str, contents, config=None
+    ) -> "types.EmbedContentResponse":
+        from google.genai import types
+
+        texts = [contents] if isinstance(contents, str) else list(contents)
+        return types.EmbedContentResponse(
+            embeddings=[types.ContentEmbedding(values=self._embed(t)) for t in texts]
+        )
+
+    def generate_content_stream(
+        self, model: str, contents, config=None
+    ) -> "Iterator[types.GenerateContentResponse]":
+        from google.genai import types
+
+        for text in ["This is an offline ", "stub response."]:
+            yield types.GenerateContentResponse(
+                candidates=[
+                    types.Candidate(
+                        content=types.Content(
+                            role="model", parts=[types.Part.from_text(text=text)]
+                        )
+                    )
+                ]
+            )
+
+
+class StubGenaiClient:
+    """
+    Offline stand-in for `genai.Client` covering the calls this app makes.
+
+    `models.embed_content` returns deterministic pseudo-random unit vectors derived
+    from the text, and `models.generate_content_stream` streams a fixed reply.
+
+    Parameters:
+        api_key (str | None): Accepted for signature compatibility, ignored
+        embedding_dim (int): Dimension of the returned embeddings
+    """
+
+    def __init__(self, api_key: str | None = None, embedding_dim: int = 768) -> None:
+        self.models = _StubModels(embedding_dim)
+
+
+def _gemini_client_factory(api_key: str | None):
+    from google import genai
+
+    return genai.Client(api_key=api_key)
+
+
+_client_factories: dict[str, Callable] = {
+    "gemini": _gemini_client_factory,
+    "stub": StubGenaiClient,
+}
+_client_registry: dict[tuple[str, str | None], object] = {}
+_client_lock = threading.Lock()
+
+
+def get_genai_client(api_key: str | None = None):
+    """
+    Return the process-wide Gemini client for the API key, creating it on first use.
+
+    Reusing one client per key keeps its HTTP connection pool (keep-alive connections,
+    TLS sessions) alive across calls and Streamlit sessions instead of paying the
+    connection setup on every turn.
+
+    Arguments:
+        api_key (str | None): The API key, defaults to the GEMINI_API_KEY env var
+
+    Returns:
+        genai.Client | StubGenaiClient: The shared client; the backend is chosen by
+                                        the GEMINI_CLIENT_BACKEND env var ("gemini" by default)
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if api_key is None:
+        api_key = os.environ.get("GEMINI_API_KEY")
+    backend = os.environ.get(CLIENT_BACKEND_ENV, "gemini").lower()
+    if backend not in _client_factories:
+        raise ValueError(f"Unknown Gemini client backend: {backend}")
+
+    key = (backend, api_key)
+    with _client_lock:
+        if key not in _client_registry:
+            _client_registry[key] = _client_factories[backend](api_key)
+        return _client_registry[key]
+
+
+def clear_genai_clients() -> None:
+    """
+    Drop every shared client so the next `get_genai_client` call creates a new one.
+    """
+    with _client_lock:
+        _client_registry.clear()
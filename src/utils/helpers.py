@@ -1,3 +1,6 @@
+import math
+import os
+import re
 import time
 from collections.abc import Callable, Generator
 
@@ -86,20 +89,58 @@ class st_spinner:
 
 
 # [IO]
-def str_stream(text: str) -> Generator:
+# "paced" (default), "char", "word" or "passthrough", see str_stream
+STREAM_MODE_ENV = "STREAM_MODE"
+STREAM_CHAR_DELAY = 0.005
+# Upper bound of the typing delay added to one streamed text in "paced" mode
+STREAM_PACE_BUDGET = float(os.environ.get("STREAM_PACE_BUDGET", 0.1))
+
+# ASCII words with their leading whitespace, any other character (e.g. CJK) alone
+_WORD_PATTERN = re.compile(r"\s*(?:\w+|\W)", re.ASCII)
+
+
+def str_stream(text: str, mode: str | None = None) -> Generator:
     """
-    Stream the provided text by yielding one character at a time with a brief delay
-    to simulate typing.
+    Stream the provided text, optionally with a typing effect.
+
+    The modes are:
+        - "paced": characters with a brief delay, but the delay added to the whole text
+                   is bounded by STREAM_PACE_BUDGET seconds (longer texts are streamed
+                   in larger slices), so the stream never lags behind the model
+        - "char": one character at a time with a brief delay, whatever the length
+        - "word": one word (or CJK character) at a time, without delay
+        - "passthrough": the text as one piece, without delay
 
     Arguments:
-        text (str): Text to stream character by character
+        text (str): Text to stream
+        mode (str | None): Streaming mode, defaults to the STREAM_MODE env var ("paced")
 
     Yields:
-        str: Individual characters of the text
+        str: Consecutive pieces of the text
+
+    Raises:
+        ValueError: If the mode is unknown
     """
-    for char in text:
-        yield char
-        time.sleep(0.005)
+    mode = (mode or os.environ.get(STREAM_MODE_ENV, "paced")).lower()
+
+    if mode == "passthrough":
+        if text:
+            yield text
+    elif mode == "word":
+        yield from _WORD_PATTERN.findall(text)
+    elif mode == "char":
+        for char in text:
+            yield char
+            time.sleep(STREAM_CHAR_DELAY)
+    elif mode == "paced":
+        n_steps = min(len(text), max(int(STREAM_PACE_BUDGET / STREAM_CHAR_DELAY), 1))
+        if n_steps:
+            step = math.ceil(len(text) / n_steps)
+            for i in range(0, len(text), step):
+                yield text[i : i + step]
+                time.sleep(STREAM_CHAR_DELAY)
+    else:
+        raise ValueError(f"Unknown stream mode: {mode}")
 
 
 # [General]
@@ -0,0 +1,47 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# "import time:  self [us] | cumulative | imported package"
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_time_report(module: str) -> dict[str, float]:
+    """
+    Import the module in a fresh interpreter with `-X importtime` and return the
+    import cost of each top-level package it pulls in.
+
+    Arguments:
+        module (str): Dotted name of the module to import, e.g. "utils.function_call"
+
+    Returns:
+        dict[str, float]: Top-level package to seconds spent importing its modules,
+                          most expensive first
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    package_seconds = defaultdict(float)
+    for line in res.stderr.splitlines():
+        if match := _IMPORT_TIME_LINE.match(line):
+            self_us, _, _, name = match.groups()
+            package_seconds[name.split(".")[0]] += int(self_us) / 1e6
+
+    return dict(sorted(package_seconds.items(), key=lambda item: -item[1]))
+
+
+if __name__ == "__main__":
+    # $ PYTHONPATH=src python -m utils.import_report utils.function_call
+    for module in sys.argv[1:] or ["utils.function_call"]:
+        report = import_time_report(module)
+        print(f"{module}: {sum(report.values()):.2f} s")
+        for package, seconds in list(report.items())[:15]:
+            print(f"  {package:<30} {seconds:6.3f} s")
@@ -1 +1,22 @@
-from .helpers import build_corpus, df_input
+from .corpus import CORPUS_FILE_ERRORS, StreamingCorpus
+from .helpers import (
+    build_corpus,
+    corpus_file_input,
+    corpus_file_variants,
+    df_input,
+    projected_vectors,
+    projection_method_input,
+)
+from .plot import (
+    first_sentence_indices,
+    merged_sentence_lines,
+    sentence_word_colors,
+    sentence_word_indices,
+)
+from .projection import project, project_in_background
+from .word2vec import (
+    appended_sentences,
+    tokenize_corpus,
+    train_word2vec,
+    train_word2vec_variants,
+)
@@ -0,0 +1,155 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+from collections.abc import Callable, Iterator
+from typing import BinaryIO
+
+CORPUS_FILE_TYPES = ["txt", "csv", "jsonl", "gz"]
+
+# Raised by reading a malformed corpus file: an unsupported name, invalid UTF-8 or
+# JSON, a malformed CSV, a corrupt (OSError) or truncated (EOFError) gzip stream
+CORPUS_FILE_ERRORS = (ValueError, csv.Error, OSError, EOFError)
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def corpus_format(file_name: str) -> str:
+    """
+    Return the format of a corpus file from its name, ignoring a ".gz" suffix.
+
+    Arguments:
+        file_name (str): e.g. "corpus.jsonl.gz"
+
+    Returns:
+        str: "txt", "csv" or "jsonl"
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    name = file_name.lower().removesuffix(".gz")
+    file_format = name.rsplit(".", 1)[-1] if "." in name else "txt"
+    if file_format not in ("txt", "csv", "jsonl"):
+        raise ValueError(f"Unsupported corpus file: {file_name}")
+    return file_format
+
+
+class StreamingCorpus:
+    """
+    A restartable iterable over the tokenized sentences of a corpus file.
+
+    Every iteration re-opens and re-reads the file, so gensim can make its vocabulary
+    and training passes without the corpus ever being held in memory. Gzip-compressed
+    files are detected by their content.
+
+    Formats:
+        - "txt": one sentence per line
+        - "csv": the "sentence" column (or the first one); rows whose "selected"
+                 column is false are skipped
+        - "jsonl": one string, or object with a "sentence" field, per line
+
+    Parameters:
+        opener (Callable[[], BinaryIO]): Returns a new binary stream of the file
+        file_format (str): "txt", "csv" or "jsonl", see `corpus_format`
+        is_remove_stopwords (bool): Whether to remove English stopwords before tokenizing
+    """
+
+    def __init__(
+        self,
+        opener: Callable[[], BinaryIO],
+        file_format: str,
+        is_remove_stopwords: bool = False,
+    ) -> None:
+        self.opener = opener
+        self.file_format = file_format
+        self.is_remove_stopwords = is_remove_stopwords
+        self._content_hash: str | None = None
+
+    @classmethod
+    def from_path(cls, path: str, is_remove_stopwords: bool = False):
+        """
+        Stream the corpus from a file on disk.
+        """
+        return cls(lambda: open(path, "rb"), corpus_format(path), is_remove_stopwords)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, file_name: str, is_remove_stopwords: bool = False):
+        """
+        Stream the corpus from in-memory file content, e.g. a Streamlit upload.
+        """
+        return cls(
+            lambda: io.BytesIO(data), corpus_format(file_name), is_remove_stopwords
+        )
+
+    def _open_text(self) -> io.TextIOWrapper:
+        stream = self.opener()
+        if stream.read(2) == _GZIP_MAGIC:
+            stream.seek(0)
+            stream = gzip.GzipFile(fileobj=stream)
+        else:
+            stream.seek(0)
+        return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+    def sentences(self) -> Iterator[str]:
+        """
+        Yield the raw, non-empty sentences of the file.
+        """
+        with self._open_text() as f:
+            if self.file_format == "csv":
+                reader = csv.reader(f)
+                header = next(reader, [])
+                column = header.index("sentence") if "sentence" in header else 0
+                selected = header.index("selected") if "selected" in header else None
+                for row in reader:
+                    if (
+                        selected is not None
+                        and len(row) > selected
+                        and row[selected].strip().lower() in ("false", "0")
+                    ):
+                        continue
+                    if len(row) > column and row[column].strip():
+                        yield row[column]
+            elif self.file_format == "jsonl":
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    sentence = (
+                        record.get("sentence", "")
+                        if isinstance(record, dict)
+                        else record
+                    )
+                    if isinstance(sentence, str) and sentence.strip():
+                        yield sentence
+            else:
+                for line in f:
+                    if line.strip():
+                        yield line
+
+    def __iter__(self) -> Iterator[list[str]]:
+        from gensim.parsing.preprocessing import remove_stopwords
+        from gensim.utils import simple_preprocess
+
+        for sentence in self.sentences():
+            if self.is_remove_stopwords:
+                sentence = remove_stopwords(sentence)
+            yield simple_preprocess(sentence)
+
+    @property
+    def cache_key(self) -> str:
+        """
+        Identify the tokenized corpus without reading it into memory: the SHA-256 of
+        the file content, the format and the tokenization options.
+        """
+        if self._content_hash is None:
+            digest = hashlib.sha256()
+            with self.opener() as stream:
+                while chunk := stream.read(_HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+            self._content_hash = digest.hexdigest()
+        return (
+            f"{self._content_hash}:{self.file_format}:"
+            f"rm_stopwords={self.is_remove_stopwords}"
+        )
@@ -1,9 +1,16 @@
 import numpy as np
 import pandas as pd
 import streamlit as st
+from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 from utils.i18n import i18n
 
+from .corpus import CORPUS_FILE_TYPES, StreamingCorpus
+from .projection import PROJECTION_METHODS, project, project_in_background
+
+# Seconds between two checks of a layout computed in the background
+PROJECTION_POLL_SECONDS = 2
+
 
 def df_input() -> pd.DataFrame:
     st.subheader("Input Data")
@@ -32,6 +39,40 @@ def df_input() -> pd.DataFrame:
     return df
 
 
+def corpus_file_input() -> UploadedFile | None:
+    return st.file_uploader(
+        i18n("week10.corpus_file"),
+        type=CORPUS_FILE_TYPES,
+        help=i18n("week10.corpus_file.help"),
+        key="corpus_file",
+    )
+
+
+def corpus_file_variants(
+    corpus_file: UploadedFile,
+) -> dict[str, StreamingCorpus] | None:
+    """
+    Stream the uploaded corpus, with and without stopwords.
+
+    Arguments:
+        corpus_file (UploadedFile): The file from `corpus_file_input`
+
+    Returns:
+        dict[str, StreamingCorpus] | None: The "original" and "rm_stopwords" corpora,
+                                           None if the file has no sentences
+    """
+    data = corpus_file.getvalue()
+    variants = {
+        "original": StreamingCorpus.from_bytes(data, corpus_file.name),
+        "rm_stopwords": StreamingCorpus.from_bytes(
+            data, corpus_file.name, is_remove_stopwords=True
+        ),
+    }
+    if next(variants["original"].sentences(), None) is None:
+        return None
+    return variants
+
+
 def build_corpus(df: pd.DataFrame) -> list[str]:
     # Track: https://github.com/astral-sh/ruff/issues/1852
     df = df[df["selected"] == True]  # noqa: E712
@@ -39,3 +80,45 @@ def build_corpus(df: pd.DataFrame) -> list[str]:
 
     corpus = df["sentence"].tolist()
     return corpus
+
+
+def projection_method_input() -> str:
+    return st.radio(
+        i18n("week10.projection"),
+        options=PROJECTION_METHODS,
+        format_func=lambda method: i18n(f"week10.projection.{method}"),
+        horizontal=True,
+        key="projection_method",
+    )
+
+
+@st.fragment(run_every=PROJECTION_POLL_SECONDS)
+def _rerun_when_projected(vectors: np.ndarray, n_components: int, method: str) -> None:
+    if project_in_background(vectors, n_components, method) is not None:
+        st.rerun()
+
+
+def projected_vectors(
+    vectors: np.ndarray, n_components: int, method: str
+) -> np.ndarray:
+    """
+    Project the word vectors with the method, showing the PCA projection meanwhile
+    when the method is slow and computed in the background.
+
+    Arguments:
+        vectors (np.ndarray): (n_words, vector_size) word vectors
+        n_components (int): Number of dimensions, 2 or 3
+        method (str): One of PROJECTION_METHODS, e.g. from `projection_method_input`
+
+    Returns:
+        np.ndarray: (n_words, n_components) coordinates
+    """
+    if method == "pca":
+        return project(vectors, n_components)
+
+    if (points := project_in_background(vectors, n_components, method)) is not None:
+        return points
+
+    st.info(i18n("week10.projection.pending"))
+    _rerun_when_projected(vectors, n_components, method)
+    return project(vectors, n_components)
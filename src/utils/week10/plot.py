@@ -0,0 +1,120 @@
+import numpy as np
+
+
+def _flat_word_ids(
+    tokenized_sentences: list[list[str]], key_to_index: dict[str, int]
+) -> tuple[np.ndarray, np.ndarray]:
+    lengths = np.fromiter(
+        (len(sentence) for sentence in tokenized_sentences),
+        dtype=np.int64,
+        count=len(tokenized_sentences),
+    )
+    word_ids = np.fromiter(
+        (
+            key_to_index.get(word, -1)
+            for sentence in tokenized_sentences
+            for word in sentence
+        ),
+        dtype=np.int64,
+        count=int(lengths.sum()),
+    )
+    return word_ids, lengths
+
+
+def first_sentence_indices(
+    tokenized_sentences: list[list[str]], key_to_index: dict[str, int]
+) -> np.ndarray:
+    """
+    Return, for every vocabulary word, the index of the first sentence containing it.
+
+    Built in one pass over the corpus instead of scanning every sentence for every
+    word.
+
+    Arguments:
+        tokenized_sentences (list[list[str]]): The tokens of each sentence
+        key_to_index (dict[str, int]): Word to vocabulary index, e.g. `model.wv.key_to_index`
+
+    Returns:
+        np.ndarray: (len(key_to_index),) sentence indices, -1 for words in no sentence
+    """
+    word_ids, lengths = _flat_word_ids(tokenized_sentences, key_to_index)
+    sentence_ids = np.repeat(np.arange(len(lengths)), lengths)
+
+    known = word_ids >= 0
+    vocab_ids, first_positions = np.unique(word_ids[known], return_index=True)
+
+    first_sentences = np.full(len(key_to_index), -1, dtype=np.int64)
+    first_sentences[vocab_ids] = sentence_ids[known][first_positions]
+    return first_sentences
+
+
+def sentence_word_colors(
+    tokenized_sentences: list[list[str]],
+    key_to_index: dict[str, int],
+    color_map: dict[int, str],
+) -> list[str]:
+    """
+    Colour every vocabulary word like the first sentence containing it.
+
+    Arguments:
+        tokenized_sentences (list[list[str]]): The tokens of each sentence
+        key_to_index (dict[str, int]): Word to vocabulary index
+        color_map (dict[int, str]): Colours cycled through by sentence index
+
+    Returns:
+        list[str]: The colour of each word, in vocabulary order
+    """
+    colors = np.array([color_map[i] for i in range(len(color_map))], dtype=object)
+    first_sentences = first_sentence_indices(tokenized_sentences, key_to_index)
+    return colors[first_sentences % len(colors)].tolist()
+
+
+def sentence_word_indices(
+    tokenized_sentences: list[list[str]], key_to_index: dict[str, int]
+) -> list[np.ndarray]:
+    """
+    Return the vocabulary indices of the words of every sentence, so their vectors
+    can be gathered with array indexing, e.g. `reduced_vectors[indices]`.
+
+    Arguments:
+        tokenized_sentences (list[list[str]]): The tokens of each sentence
+        key_to_index (dict[str, int]): Word to vocabulary index
+
+    Returns:
+        list[np.ndarray]: The indices of each sentence, words out of the vocabulary left out
+    """
+    word_ids, lengths = _flat_word_ids(tokenized_sentences, key_to_index)
+    return [
+        indices[indices >= 0] for indices in np.split(word_ids, np.cumsum(lengths)[:-1])
+    ]
+
+
+def merged_sentence_lines(
+    points: np.ndarray, sentence_indices: list[np.ndarray], n_groups: int
+) -> dict[int, np.ndarray]:
+    """
+    Merge the sentence paths into one polyline per group (sentence index modulo
+    `n_groups`, i.e. per colour), separated by NaN rows that Plotly draws as gaps.
+
+    Arguments:
+        points (np.ndarray): (n_words, dims) coordinates of the vocabulary
+        sentence_indices (list[np.ndarray]): Vocabulary indices of each sentence
+        n_groups (int): Number of groups, e.g. the number of colours
+
+    Returns:
+        dict[int, np.ndarray]: Group to its (n_points, dims) polyline, for the groups
+                               with at least one sentence
+    """
+    lines = {}
+    for group in range(min(n_groups, len(sentence_indices))):
+        separator = np.array([-1])
+        ids = np.concatenate(
+            [
+                np.concatenate([indices, separator])
+                for indices in sentence_indices[group::n_groups]
+            ]
+        )
+        line = points[ids].astype(float)
+        line[ids < 0] = np.nan
+        lines[group] = line
+    return lines
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from utils.cache import LRUCache
+
+PROJECTION_METHODS = ["pca", "tsne"]
+
+# From this many words, PCA uses a randomized SVD of the few components it keeps
+# instead of the full decomposition
+RANDOMIZED_PCA_MIN_WORDS = int(os.environ.get("RANDOMIZED_PCA_MIN_WORDS", 5000))
+
+# Threads computing the slow layouts (t-SNE) in the background
+PROJECTION_WORKERS = int(os.environ.get("PROJECTION_WORKERS", 1))
+
+# Shared by every session; bounded by number of projections and by their total size
+projection_cache = LRUCache(
+    max_entries=int(os.environ.get("PROJECTION_CACHE_SIZE", 32)),
+    max_weight=int(os.environ.get("PROJECTION_CACHE_MAX_MB", 128)) * 2**20,
+    weigher=lambda points: points.nbytes,
+)
+
+_executor: ThreadPoolExecutor | None = None
+_pending: dict[tuple, Future] = {}
+_lock = threading.Lock()
+
+
+def projection_key(vectors: np.ndarray, n_components: int, method: str) -> tuple:
+    """
+    Return the cache key of a projection: the SHA-256 of the vectors, so the models
+    trained on the same corpus share it.
+    """
+    digest = hashlib.sha256(np.ascontiguousarray(vectors).tobytes()).hexdigest()
+    return digest, vectors.shape, n_components, method
+
+
+def pca(vectors: np.ndarray, n_components: int) -> np.ndarray:
+    """
+    Project the vectors on their first principal components.
+
+    Arguments:
+        vectors (np.ndarray): (n_words, vector_size) word vectors
+        n_components (int): Number of dimensions to keep
+
+    Returns:
+        np.ndarray: (n_words, n_components) coordinates, the components a vocabulary
+                    too small to have are 0
+    """
+    from sklearn.decomposition import PCA
+
+    n_fitted = min(n_components, *vectors.shape)
+    points = np.zeros((len(vectors), n_components), dtype=np.float32)
+    if n_fitted == 0:
+        return points
+
+    solver = "randomized" if len(vectors) >= RANDOMIZED_PCA_MIN_WORDS else "full"
+    points[:, :n_fitted] = PCA(
+        n_components=n_fitted, svd_solver=solver, random_state=0
+    ).fit_transform(vectors)
+    return points
+
+
+def tsne(vectors: np.ndarray, n_components: int) -> np.ndarray:
+    """
+    Lay the vectors out with t-SNE, which keeps the neighbourhoods of the words.
+
+    Arguments:
+        vectors (np.ndarray): (n_words, vector_size) word vectors
+        n_components (int): Number of dimensions, 2 or 3
+
+    Returns:
+        np.ndarray: (n_words, n_components) coordinates
+    """
+    from sklearn.manifold import TSNE
+
+    # t-SNE needs more words than its perplexity
+    if len(vectors) <= n_components + 1:
+        return pca(vectors, n_components)
+
+    return TSNE(
+        n_components=n_components,
+        perplexity=min(30.0, len(vectors) - 1),
+        init="pca",
+        random_state=0,
+    ).fit_transform(vectors)
+
+
+_PROJECTIONS = {"pca": pca, "tsne": tsne}
+
+
+def project(vectors: np.ndarray, n_components: int, method: str = "pca") -> np.ndarray:
+    """
+    Project the word vectors, reusing the cached projection of the same vectors.
+
+    Arguments:
+        vectors (np.ndarray): (n_words, vector_size) word vectors, e.g. `model.wv.vectors`
+        n_components (int): Number of dimensions, 2 or 3
+        method (str): One of PROJECTION_METHODS
+
+    Returns:
+        np.ndarray: (n_words, n_components) coordinates, in the order of the vectors
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method not in _PROJECTIONS:
+        raise ValueError(f"Unknown projection method: {method}")
+
+    key = projection_key(vectors, n_components, method)
+    return projection_cache.get_or_compute(
+        key, lambda: _PROJECTIONS[method](vectors, n_components)
+    )
+
+
+def _project_pending(
+    key: tuple, vectors: np.ndarray, n_components: int, method: str
+) -> np.ndarray:
+    points = project(vectors, n_components, method)
+    # Now cached; a failed projection stays pending until its error is collected
+    with _lock:
+        _pending.pop(key, None)
+    return points
+
+
+def get_projection_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide executor of the background projections, starting it on
+    first use.
+    """
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PROJECTION_WORKERS, thread_name_prefix="projection"
+            )
+        return _executor
+
+
+def project_in_background(
+    vectors: np.ndarray, n_components: int, method: str
+) -> np.ndarray | None:
+    """
+    Return the cached projection, or start computing it in a background worker.
+
+    Sessions asking for the same projection share one computation; call again (e.g.
+    on the next rerun) to collect it.
+
+    Arguments:
+        vectors (np.ndarray): (n_words, vector_size) word vectors
+        n_components (int): Number of dimensions, 2 or 3
+        method (str): One of PROJECTION_METHODS
+
+    Returns:
+        np.ndarray | None: (n_words, n_components) coordinates, None while computing
+
+    Raises:
+        ValueError: If the method is unknown
+        Exception: What the projection raised in the background
+    """
+    if method not in _PROJECTIONS:
+        raise ValueError(f"Unknown projection method: {method}")
+
+    key = projection_key(vectors, n_components, method)
+    if (points := projection_cache.get(key)) is not None:
+        return points
+
+    executor = get_projection_executor()
+    with _lock:
+        if (future := _pending.get(key)) is None:
+            future = _pending[key] = executor.submit(
+                _project_pending, key, vectors, n_components, method
+            )
+
+    if not future.done():
+        return None
+    with _lock:
+        _pending.pop(key, None)
+    return future.result()
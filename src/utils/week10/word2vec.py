@@ -0,0 +1,248 @@
+import copy
+import hashlib
+import json
+import os
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
+
+from utils.cache import LRUCache
+
+# gensim is imported on first training, not when a page is opened
+if TYPE_CHECKING:
+    from gensim.models import Word2Vec
+
+
+def word2vec_nbytes(model: "Word2Vec") -> int:
+    """
+    Return the memory held by the arrays of the model (word vectors and weights).
+
+    Arguments:
+        model (Word2Vec): A trained model
+
+    Returns:
+        int: Number of bytes
+    """
+    arrays = [
+        model.wv.vectors,
+        getattr(model, "syn1neg", None),
+        getattr(model, "syn1", None),
+        getattr(model.wv, "vectors_lockf", None),
+    ]
+    return sum(getattr(array, "nbytes", 0) for array in arrays)
+
+
+# Training threads shared by the models trained at once, one per core by default
+WORD2VEC_WORKER_BUDGET = int(os.environ.get("WORD2VEC_WORKERS", os.cpu_count() or 1))
+
+# Seconds between two progress reports of train_word2vec_variants
+PROGRESS_INTERVAL = 0.2
+
+# Shared by every session; bounded by number of models and by their total size
+word2vec_model_cache = LRUCache(
+    max_entries=int(os.environ.get("WORD2VEC_CACHE_SIZE", 16)),
+    max_weight=int(os.environ.get("WORD2VEC_CACHE_MAX_MB", 512)) * 2**20,
+    weigher=word2vec_nbytes,
+)
+
+
+def tokenize_corpus(
+    training_corpus: list[str], is_remove_stopwords: bool = False
+) -> list[list[str]]:
+    """
+    Tokenize the sentences with gensim's simple_preprocess.
+
+    Arguments:
+        training_corpus (list[str]): The sentences
+        is_remove_stopwords (bool): Whether to remove English stopwords first
+
+    Returns:
+        list[list[str]]: The tokens of each sentence
+    """
+    from gensim.parsing.preprocessing import remove_stopwords
+    from gensim.utils import simple_preprocess
+
+    if is_remove_stopwords:
+        return [
+            simple_preprocess(remove_stopwords(sentence))
+            for sentence in training_corpus
+        ]
+    return [simple_preprocess(sentence) for sentence in training_corpus]
+
+
+def corpus_hash(tokenized_sentences: list[list[str]]) -> str:
+    """
+    Return the SHA-256 of the tokenized sentences.
+    """
+    data = json.dumps(tokenized_sentences, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def appended_sentences(
+    previous: list[list[str]], current: list[list[str]]
+) -> list[list[str]] | None:
+    """
+    Diff two versions of a corpus, e.g. before and after editing the sentence table.
+
+    Arguments:
+        previous (list[list[str]]): The tokens of each sentence before the edit
+        current (list[list[str]]): The tokens of each sentence after the edit
+
+    Returns:
+        list[list[str]] | None: The sentences appended after the previous ones, None if
+                                a previous sentence was deleted, changed or moved
+    """
+    if len(current) < len(previous) or current[: len(previous)] != previous:
+        return None
+    return current[len(previous) :]
+
+
+def _epoch_callback(on_epoch: Callable[[int, int], None], epochs: int):
+    from gensim.models.callbacks import CallbackAny2Vec
+
+    class EpochCallback(CallbackAny2Vec):
+        def __init__(self) -> None:
+            self.epoch = 0
+
+        def on_epoch_end(self, model) -> None:
+            self.epoch += 1
+            on_epoch(self.epoch, epochs)
+
+    return EpochCallback()
+
+
+def _config_key(config: dict) -> tuple:
+    # The number of training threads does not change what the model learns
+    return tuple(sorted((k, v) for k, v in config.items() if k != "workers"))
+
+
+def train_word2vec(
+    tokenized_sentences: Iterable[list[str]],
+    on_epoch: Callable[[int, int], None] | None = None,
+    previous: list[list[str]] | None = None,
+    **config,
+) -> "Word2Vec":
+    """
+    Train a Word2Vec model, reusing the cached model of the same corpus and config.
+
+    When the corpus only appends sentences to `previous` and the model of `previous` is
+    cached, a copy of that model is updated instead: the new words are added to its
+    vocabulary and it is trained further on the new sentences only, so an edit costs
+    in proportion to its size. Deleting or changing a sentence retrains from scratch.
+
+    The cached models are shared across sessions, so they must not be modified (e.g.
+    trained further); copy them first.
+
+    Arguments:
+        tokenized_sentences (Iterable[list[str]]): The tokens of each sentence, either
+            a list or a restartable iterable with a `cache_key` (e.g. StreamingCorpus),
+            which is then streamed instead of held in memory
+        on_epoch (Callable[[int, int], None] | None): Called with (epoch, epochs) after
+            each training epoch, not called when the model is cached
+        previous (list[list[str]] | None): The corpus of a model trained earlier with
+            the same config, e.g. before the last edit of the sentence table
+        **config: Word2Vec parameters, e.g. vector_size, window, min_count, workers, sg
+
+    Returns:
+        Word2Vec: The trained model
+    """
+    from gensim.models import Word2Vec
+
+    corpus_key = getattr(tokenized_sentences, "cache_key", None)
+    key = (corpus_key or corpus_hash(tokenized_sentences), _config_key(config))
+
+    def callbacks(epochs: int) -> list:
+        return [_epoch_callback(on_epoch, epochs)] if on_epoch else []
+
+    def update() -> "Word2Vec | None":
+        # Streamed corpora are not diffed
+        if not isinstance(previous, list) or not isinstance(tokenized_sentences, list):
+            return None
+        if not (added := appended_sentences(previous, tokenized_sentences)):
+            return None
+        base = word2vec_model_cache.get((corpus_hash(previous), key[1]))
+        if base is None:
+            return None
+
+        model = copy.deepcopy(base)
+        model.workers = config.get("workers", model.workers)
+        model.build_vocab(added, update=True)
+        model.train(
+            added,
+            total_examples=len(added),
+            epochs=model.epochs,
+            callbacks=callbacks(model.epochs),
+        )
+        return model
+
+    def train() -> "Word2Vec":
+        model = update()
+        if model is None:
+            model = Word2Vec(
+                tokenized_sentences,
+                callbacks=callbacks(config.get("epochs", 5)),
+                **config,
+            )
+        # Do not keep the callbacks (and what they reference) alive in the cache
+        model.callbacks = ()
+        return model
+
+    return word2vec_model_cache.get_or_compute(key, train)
+
+
+def train_word2vec_variants(
+    variants: dict[str, Iterable[list[str]]],
+    worker_budget: int = WORD2VEC_WORKER_BUDGET,
+    progress: Callable[[dict[str, float]], None] | None = None,
+    previous: dict[str, list[list[str]]] | None = None,
+    **config,
+) -> dict[str, tuple["Word2Vec", float]]:
+    """
+    Train one Word2Vec model per corpus variant concurrently, splitting the worker
+    budget between them.
+
+    gensim releases the GIL while training, so the variants train in parallel threads
+    and the whole takes about as long as the slowest one.
+
+    Arguments:
+        variants (dict[str, Iterable[list[str]]]): Variant name to its tokenized
+                                                   sentences, see `train_word2vec`
+        worker_budget (int): Total number of training threads
+        progress (Callable[[dict[str, float]], None] | None): Called from the calling
+            thread (so it may update Streamlit elements) with the fraction of the
+            epochs done per variant, until every variant is trained
+        previous (dict[str, list[list[str]]] | None): Variant name to the corpus it was
+            trained on earlier, to update those models, see `train_word2vec`
+        **config: Word2Vec parameters shared by the variants, except workers
+
+    Returns:
+        dict[str, tuple[Word2Vec, float]]: Variant name to its model and its training
+                                           wall time in seconds (near 0 when cached)
+    """
+    workers = max(worker_budget // max(len(variants), 1), 1)
+    done = dict.fromkeys(variants, 0.0)
+
+    def timed_train(name: str) -> tuple["Word2Vec", float]:
+        def on_epoch(epoch: int, epochs: int) -> None:
+            done[name] = epoch / epochs
+
+        start = time.perf_counter()
+        model = train_word2vec(
+            variants[name],
+            on_epoch=on_epoch,
+            previous=(previous or {}).get(name),
+            **config,
+            workers=workers,
+        )
+        done[name] = 1.0
+        return model, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(len(variants), 1)) as executor:
+        futures = {name: executor.submit(timed_train, name) for name in variants}
+        while progress:
+            pending = wait(futures.values(), timeout=PROGRESS_INTERVAL).not_done
+            progress(dict(done))
+            if not pending:
+                break
+        return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,5 @@
+import os
+
+# The AppTest runs would otherwise start the tool workers, which load the CKIP models
+# in the background and delay the end of the test session
+os.environ.setdefault("CKIP_WARMUP", "0")
@@ -0,0 +1,292 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.function_call.article_index import (
+    ArticleIndex,
+    ArticleMetadata,
+    clear_article_index,
+    compile_article_store,
+    get_article_index,
+)
+from utils.function_call.vector_search import ExactSearch, IVFSearch, top_k_indices
+
+
+def write_article_csv(path, vectors: list) -> None:
+    pd.DataFrame(
+        [
+            {
+                "url": f"https://www.dcard.tw/f/pet/p/{i}",
+                "title": f"title {i}",
+                "author": f"author {i}",
+                "createdAt": "2025-05-01T00:00:00.000Z",
+                "content": f"content {i}",
+                "vectorize": json.dumps(vec) if vec is not None else None,
+            }
+            for i, vec in enumerate(vectors)
+        ]
+    ).to_csv(path, index=False)
+
+
+@pytest.fixture
+def article_csv(tmp_path):
+    path = tmp_path / "article_contents.csv"
+    write_article_csv(
+        path,
+        [[1.0, 0.0, 0.0], [0.0, 2.0, 0.0], None, [1.0, 1.0, 0.0], [1.0, 1.0]],
+    )
+    yield str(path)
+    clear_article_index()
+
+
+def test_index_skips_invalid_rows(article_csv) -> None:
+    index = ArticleIndex.from_csv(article_csv)
+
+    assert len(index) == 3
+    assert index.dim == 3
+    assert index.matrix.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(index.matrix, axis=1), 1, rtol=1e-6)
+
+
+def test_top_k_order_and_metadata(article_csv) -> None:
+    res = ArticleIndex.from_csv(article_csv).top_k([0.0, 1.0, 0.0], k=2)
+
+    assert [r["title"] for r in res] == ["title 1", "title 3"]
+    assert res[0]["url"] == "https://www.dcard.tw/f/pet/p/1"
+    assert res[0]["similarity"] == pytest.approx(1.0)
+    assert res[1]["similarity"] == pytest.approx(np.sqrt(0.5))
+
+
+def test_top_k_dimension_mismatch(article_csv) -> None:
+    with pytest.raises(ValueError):
+        ArticleIndex.from_csv(article_csv).top_k([1.0, 0.0], k=2)
+
+
+def test_shared_index_reloads_on_change(article_csv) -> None:
+    index = get_article_index(article_csv)
+    assert get_article_index(article_csv) is index
+
+    # Touching the file without changing it keeps the loaded index
+    os.utime(article_csv, ns=(1, 1))
+    assert get_article_index(article_csv) is index
+
+    write_article_csv(article_csv, [[0.0, 0.0, 1.0]])
+    reloaded = get_article_index(article_csv)
+    assert reloaded is not index
+    assert len(reloaded) == 1
+
+
+def test_compiled_store_round_trip(article_csv, tmp_path) -> None:
+    store_dir = str(tmp_path / "article_store")
+    compiled = compile_article_store(article_csv, store_dir)
+
+    loaded = ArticleIndex.from_store(store_dir)
+    assert isinstance(loaded.matrix, np.memmap)
+    np.testing.assert_array_equal(loaded.matrix, compiled.matrix)
+    assert loaded.top_k([0.0, 1.0, 0.0], k=3) == compiled.top_k([0.0, 1.0, 0.0], k=3)
+
+    index = get_article_index(article_csv, store_dir)
+    assert isinstance(index.matrix, np.memmap)
+
+
+def test_stale_store_falls_back_to_csv(article_csv, tmp_path) -> None:
+    store_dir = str(tmp_path / "article_store")
+    compile_article_store(article_csv, store_dir)
+
+    write_article_csv(article_csv, [[0.0, 0.0, 1.0]])
+    index = get_article_index(article_csv, store_dir)
+
+    assert not isinstance(index.matrix, np.memmap)
+    assert len(index) == 1
+
+
+def test_store_cold_start_does_not_hash_csv(article_csv, tmp_path, mocker) -> None:
+    from utils.function_call import article_index
+
+    store_dir = str(tmp_path / "article_store")
+    compile_article_store(article_csv, store_dir)
+    sha256 = mocker.spy(article_index, "file_sha256")
+
+    index = get_article_index(article_csv, store_dir)
+    assert isinstance(index.matrix, np.memmap)
+    sha256.assert_not_called()
+
+    # A touched CSV is hashed once, and the store kept when its content is the same
+    clear_article_index()
+    os.utime(article_csv, ns=(1, 1))
+    assert isinstance(get_article_index(article_csv, store_dir).matrix, np.memmap)
+    sha256.assert_called_once()
+
+
+def test_store_used_without_csv(article_csv, tmp_path) -> None:
+    store_dir = str(tmp_path / "article_store")
+    compiled = compile_article_store(article_csv, store_dir)
+    os.remove(article_csv)
+
+    index = get_article_index(article_csv, store_dir)
+    assert index.top_k([0.0, 1.0, 0.0], k=3) == compiled.top_k([0.0, 1.0, 0.0], k=3)
+    assert get_article_index(article_csv, store_dir) is index
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 10])
+def test_top_k_indices_matches_full_sort(k: int) -> None:
+    scores = np.random.default_rng(0).random(8).astype(np.float32)
+
+    np.testing.assert_array_equal(
+        top_k_indices(scores, k), scores.argsort()[::-1][: min(k, len(scores))]
+    )
+
+
+def median_seconds(func, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("n", [1_000, 10_000, 100_000, 1_000_000])
+def test_benchmark_top_k_selection(n: int) -> None:
+    k = 15
+    rng = np.random.default_rng(0)
+    scores = rng.random(n, dtype=np.float32)
+    frame = pd.DataFrame(
+        {
+            column: [f"{column} {i}" for i in range(n)]
+            for column in ["url", "title", "author", "content"]
+        }
+    )
+    index = ArticleIndex(
+        np.empty((n, 0), dtype=np.float32), ArticleMetadata.from_frame(frame)
+    )
+
+    def full_sort_path():
+        return [
+            {
+                "url": frame.iloc[idx]["url"],
+                "title": frame.iloc[idx]["title"],
+                "author": frame.iloc[idx]["author"],
+                "content": frame.iloc[idx]["content"],
+                "similarity": scores[idx],
+            }
+            for idx in scores.argsort()[-k:][::-1]
+        ]
+
+    def partial_path():
+        indices = top_k_indices(scores, k)
+        return index.hits(indices, scores[indices])
+
+    assert [r["url"] for r in partial_path()] == [r["url"] for r in full_sort_path()]
+
+    full_sort = median_seconds(full_sort_path)
+    partial = median_seconds(partial_path)
+    print(
+        f"\nn={n:>9,}: argsort+iloc {full_sort * 1e3:8.2f} ms, "
+        f"argpartition+gather {partial * 1e3:8.2f} ms"
+    )
+
+
+def clustered_vectors(n: int, dim: int, n_clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(n_clusters, size=n)]
+    vectors += 0.5 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_ivf_full_probe_matches_exact() -> None:
+    matrix = clustered_vectors(2_000, 16, 10)
+    query = matrix[0]
+
+    exact = ExactSearch(matrix).search(query, 15)
+    ivf = IVFSearch(matrix, n_lists=20, n_probe=20).search(query, 15)
+
+    np.testing.assert_array_equal(ivf[0], exact[0])
+    np.testing.assert_allclose(ivf[1], exact[1])
+
+
+def test_backend_switch(article_csv, monkeypatch) -> None:
+    index = ArticleIndex.from_csv(article_csv)
+
+    monkeypatch.setenv("ARTICLE_SEARCH_BACKEND", "ivf")
+    assert isinstance(index.backend(), IVFSearch)
+    assert index.top_k([0.0, 1.0, 0.0], k=1)[0]["title"] == "title 1"
+
+    with pytest.raises(ValueError):
+        index.backend("unknown")
+
+
+def test_store_keeps_ivf_lists(tmp_path, monkeypatch, mocker) -> None:
+    matrix = clustered_vectors(500, 8, 5)
+    csv_path = tmp_path / "article_contents.csv"
+    write_article_csv(csv_path, matrix.tolist())
+    store_dir = str(tmp_path / "article_store")
+    compiled = compile_article_store(str(csv_path), store_dir)
+
+    monkeypatch.setenv("ARTICLE_SEARCH_BACKEND", "ivf")
+    train = mocker.spy(IVFSearch, "_train_centroids")
+    try:
+        index = get_article_index(str(csv_path), store_dir)
+        assert index.top_k(matrix[0], k=5) == compiled.top_k(
+            matrix[0], k=5, backend="ivf"
+        )
+    finally:
+        clear_article_index()
+
+    # Restored from the store, and built before the first query
+    train.assert_not_called()
+    assert isinstance(index._backends["ivf"], IVFSearch)
+
+
+def test_index_load_builds_search_backend(article_csv, monkeypatch) -> None:
+    monkeypatch.setenv("ARTICLE_SEARCH_BACKEND", "ivf")
+
+    index = get_article_index(article_csv)
+
+    assert isinstance(index._backends["ivf"], IVFSearch)
+    assert index.ivf_lists is not None
+
+
+@pytest.mark.performance
+def test_benchmark_ivf_recall_latency() -> None:
+    k = 15
+    matrix = clustered_vectors(200_000, 256, 500)
+    queries = clustered_vectors(50, 256, 500, seed=1)
+
+    exact = ExactSearch(matrix)
+    exact_hits = [set(exact.search(q, k)[0].tolist()) for q in queries]
+    exact_seconds = median_seconds(lambda: [exact.search(q, k) for q in queries], 3)
+    print(f"\nexact: {exact_seconds / len(queries) * 1e3:.2f} ms/query")
+
+    ivf = IVFSearch(matrix)
+    for n_probe in [1, 4, 16, 64]:
+        ivf.n_probe = n_probe
+        recall = np.mean(
+            [
+                len(hits & set(ivf.search(q, k)[0].tolist())) / k
+                for q, hits in zip(queries, exact_hits, strict=True)
+            ]
+        )
+        seconds = median_seconds(lambda: [ivf.search(q, k) for q in queries], 3)
+        print(
+            f"ivf n_lists={ivf.n_lists} n_probe={n_probe:>2}: "
+            f"{seconds / len(queries) * 1e3:.2f} ms/query, recall@{k}={recall:.3f}"
+        )
+
+    assert recall >= 0.9
+
+
+def test_top_k_batch_matches_single_queries(article_csv) -> None:
+    index = ArticleIndex.from_csv(article_csv)
+    queries = [[0.0, 1.0, 0.0], [1.0, 0.0, 0.0], [1.0, 1.0, 0.0]]
+
+    for backend in ["exact", "ivf"]:
+        assert index.top_k_batch(queries, k=2, backend=backend) == [
+            index.top_k(q, k=2, backend=backend) for q in queries
+        ]
@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+import pytest
+from pytest_mock import MockFixture
+
+from utils.cache import LRUCache
+
+
+def test_lru_eviction_and_counters() -> None:
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "hits": 2,
+        "misses": 1,
+        "entries": 2,
+        "max_entries": 2,
+        "weight": 0,
+    }
+
+
+def test_get_or_compute_only_computes_once(mocker: MockFixture) -> None:
+    cache = LRUCache()
+    compute = mocker.Mock(return_value=[1.0, 2.0])
+
+    assert cache.get_or_compute(("q", "model"), compute) == [1.0, 2.0]
+    assert cache.get_or_compute(("q", "model"), compute) == [1.0, 2.0]
+    compute.assert_called_once()
+
+
+def test_persisted_entries_survive_eviction_and_restart(tmp_path) -> None:
+    cache = LRUCache(max_entries=1, persist_dir=str(tmp_path))
+    cache.put("a", {"value": 1})
+    cache.put("b", {"value": 2})
+
+    assert "a" not in cache
+    assert cache.get("a") == {"value": 1}
+
+    restarted = LRUCache(max_entries=1, persist_dir=str(tmp_path))
+    assert restarted.get("b") == {"value": 2}
+
+
+def test_weight_bounded_eviction() -> None:
+    cache = LRUCache(max_entries=10, max_weight=10, weigher=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.put("c", "xxxx")
+
+    assert "a" not in cache
+    assert cache.weight == 8
+
+    cache.put("too-big", "x" * 11)
+    assert "too-big" not in cache
+    assert cache.weight == 8
+
+
+def test_invalid_size() -> None:
+    with pytest.raises(ValueError):
+        LRUCache(max_entries=0)
+    with pytest.raises(ValueError):
+        LRUCache(max_weight=10)
+
+
+def test_embed_query_reuses_normalized_queries(mocker: MockFixture) -> None:
+    from utils.function_call import embeddings
+
+    client = mocker.patch.object(embeddings, "get_genai_client").return_value
+    client.models.embed_content.return_value.embeddings = [
+        mocker.Mock(values=[0.1, 0.2, 0.3])
+    ]
+    mocker.patch.object(embeddings, "query_embedding_cache", LRUCache())
+
+    first = embeddings.embed_query("穩定的　貓 ")
+    second = embeddings.embed_query("穩定的 貓")
+
+    assert first.tolist() == pytest.approx([0.1, 0.2, 0.3])
+    assert second is first
+    client.models.embed_content.assert_called_once()
+    assert embeddings.query_embedding_cache.stats()["hits"] == 1
+
+
+def test_embed_queries_batches_uncached_queries(mocker: MockFixture) -> None:
+    from utils.function_call import embeddings
+
+    client = mocker.patch.object(embeddings, "get_genai_client").return_value
+    client.models.embed_content.return_value.embeddings = [
+        mocker.Mock(values=[1.0, 0.0]),
+        mocker.Mock(values=[0.0, 1.0]),
+    ]
+    cache = LRUCache()
+    cache.put(
+        ("cached", embeddings.EMBEDDING_MODEL, embeddings.QUERY_TASK_TYPE),
+        np.array([7.0, 7.0], dtype=np.float32),
+    )
+    mocker.patch.object(embeddings, "query_embedding_cache", cache)
+
+    res = embeddings.embed_queries(["a", "cached", "b", "A"])
+
+    assert res.tolist() == [[1.0, 0.0], [7.0, 7.0], [0.0, 1.0], [1.0, 0.0]]
+    client.models.embed_content.assert_called_once()
+    assert client.models.embed_content.call_args.kwargs["contents"] == ["a", "b"]
+
+
+def test_disk_bounded_eviction(tmp_path) -> None:
+    cache = LRUCache(max_entries=1, persist_dir=str(tmp_path), max_disk_bytes=1000)
+    for i in range(10):
+        cache.put(i, "x" * 200)
+        # Distinct modification times, however coarse the file system clock
+        os.utime(cache._disk_path(i), ns=(i, i))
+
+    files = list(tmp_path.glob("*.pkl"))
+    assert sum(f.stat().st_size for f in files) <= 1000
+    # The least recently written entries are deleted first
+    assert cache.get(9) == "x" * 200
+    assert cache.get(0) is None
+
+    # Reloading an entry from disk marks it recently used
+    survivor = next(i for i in range(9) if os.path.exists(cache._disk_path(i)))
+    assert cache.get(survivor) == "x" * 200
+    cache.put(10, "x" * 200)
+    assert os.path.exists(cache._disk_path(survivor))
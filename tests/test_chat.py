@@ -94,3 +94,130 @@ def test_chat_autogen_word_cloud(mocker: MockFixture) -> None:
     at.chat_input(key="chat_bot").set_value(prompt).run()
 
     assert not at.exception
+
+
+def test_chat_parallel_function_calls(mocker: MockFixture, monkeypatch) -> None:
+    from google.genai import types
+
+    from utils import genai_client
+    from utils.function_call import tool_executor
+
+    monkeypatch.setenv("GEMINI_CLIENT_BACKEND", "stub")
+    monkeypatch.setattr(tool_executor, "TOOL_PROCESS_WORKERS", 0)
+    genai_client.clear_genai_clients()
+    mocker.patch.object(
+        type(st.context), "locale", new_callable=PropertyMock, return_value="en"
+    )
+
+    running = []
+    max_running = []
+
+    def content_wordcloud(contents: list[str]) -> str:
+        running.append(contents)
+        max_running.append(len(running))
+        # The first call finishes last
+        time.sleep(0.1 * len(contents[0]))
+        running.remove(contents)
+        return f"cloud of {contents[0]}"
+
+    def generate_content_stream(self, model, contents, config=None):
+        last_part = contents[-1].parts[0]
+        if last_part.text and last_part.text.startswith("draw"):
+            yield types.GenerateContentResponse(
+                candidates=[
+                    types.Candidate(
+                        content=types.Content(
+                            role="model",
+                            parts=[
+                                types.Part.from_function_call(
+                                    name="content_wordcloud",
+                                    args={"contents": [name]},
+                                )
+                                for name in ["cats" * 3, "dogs"]
+                            ],
+                        )
+                    )
+                ]
+            )
+        else:
+            yield from original_stream(self, model, contents, config)
+
+    original_stream = genai_client._StubModels.generate_content_stream
+    mocker.patch("utils.function_call.content_wordcloud", content_wordcloud)
+    mocker.patch.object(
+        genai_client._StubModels, "generate_content_stream", generate_content_stream
+    )
+
+    at = AppTest.from_file("../src/streamlit_app.py", default_timeout=30).run()
+    at.switch_page("./pages/pets_gemini.py").run()
+
+    at.chat_input(key="chat_bot").set_value("draw word clouds").run()
+
+    assert not at.exception
+    response = at.chat_message[-1].markdown[0].value
+    assert response.index("cloud of catscatscats") < response.index("cloud of dogs")
+    assert response.endswith("stub response.")
+    assert max(max_running) == 2
+
+    genai_client.clear_genai_clients()
+
+
+def test_chat_wordcloud_image(mocker: MockFixture, monkeypatch, tmp_path) -> None:
+    from google.genai import types
+    from PIL import Image
+
+    from utils import genai_client
+    from utils.assets import asset_store
+    from utils.function_call import tool_executor
+
+    monkeypatch.setenv("GEMINI_CLIENT_BACKEND", "stub")
+    monkeypatch.setattr(tool_executor, "TOOL_PROCESS_WORKERS", 0)
+    monkeypatch.setattr(asset_store, "root", str(tmp_path))
+    genai_client.clear_genai_clients()
+    mocker.patch.object(
+        type(st.context), "locale", new_callable=PropertyMock, return_value="en"
+    )
+
+    image = tmp_path / "image.png"
+    Image.new("RGB", (4, 4)).save(image)
+    key = asset_store.put(image.read_bytes(), "png")
+
+    def content_wordcloud(contents: list[str]) -> str:
+        return f"{asset_store.ref(key, 'wordcloud')}\n\nTop words: cats (1)"
+
+    def generate_content_stream(self, model, contents, config=None):
+        last_part = contents[-1].parts[0]
+        if last_part.text and last_part.text.startswith("draw"):
+            function_call = types.Part.from_function_call(
+                name="content_wordcloud", args={"contents": ["cats"]}
+            )
+            yield types.GenerateContentResponse(
+                candidates=[
+                    types.Candidate(
+                        content=types.Content(role="model", parts=[function_call])
+                    )
+                ]
+            )
+        else:
+            yield from original_stream(self, model, contents, config)
+
+    original_stream = genai_client._StubModels.generate_content_stream
+    mocker.patch("utils.function_call.content_wordcloud", content_wordcloud)
+    mocker.patch.object(
+        genai_client._StubModels, "generate_content_stream", generate_content_stream
+    )
+
+    at = AppTest.from_file("../src/streamlit_app.py", default_timeout=30).run()
+    at.switch_page("./pages/pets_gemini.py").run()
+    at.chat_input(key="chat_bot").set_value("draw a word cloud").run()
+
+    assert not at.exception
+    # Shown from the asset file while streaming, then from the history on reruns
+    assert len(at.chat_message[-1].get("imgs")) == 1
+    at.run()
+    message = at.chat_message[-1]
+    assert len(message.get("imgs")) == 1
+    assert "Top words: cats (1)" in message.markdown[-1].value
+    assert not any("asset:" in markdown.value for markdown in message.markdown)
+
+    genai_client.clear_genai_clients()
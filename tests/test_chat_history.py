@@ -0,0 +1,95 @@
+import time
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+def chat_history_app(n_messages: int, page_size: int) -> None:
+    from utils.bots import display_chat_history
+    from utils.bots.ctx_mgr import CtxMgr
+
+    ctx_history = CtxMgr(
+        "history",
+        [
+            {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+            for i in range(n_messages)
+        ],
+    )
+    display_chat_history(ctx_history, page_size=page_size)
+
+
+def rendered_messages(at: AppTest) -> list[str]:
+    return [message.markdown[0].value for message in at.chat_message]
+
+
+def test_history_is_paginated() -> None:
+    at = AppTest.from_function(chat_history_app, args=(50, 20)).run()
+
+    assert rendered_messages(at) == [f"message {i}" for i in range(30, 50)]
+    assert "20" in at.button[0].label
+
+    at.button[0].click().run()
+    assert rendered_messages(at) == [f"message {i}" for i in range(10, 50)]
+    assert "10" in at.button[0].label
+
+    at.button[0].click().run()
+    assert rendered_messages(at) == [f"message {i}" for i in range(50)]
+    assert not at.button
+    assert not at.exception
+
+
+def test_short_history_has_no_button() -> None:
+    at = AppTest.from_function(chat_history_app, args=(3, 20)).run()
+
+    assert len(at.chat_message) == 3
+    assert not at.button
+
+
+@pytest.mark.performance
+def test_benchmark_history_rerun() -> None:
+    print()
+    for n_messages in [10, 100, 1000]:
+        seconds = {}
+        for name, page_size in [("paginated", 20), ("full", n_messages)]:
+            at = AppTest.from_function(
+                chat_history_app, args=(n_messages, page_size), default_timeout=60
+            ).run()
+            start = time.perf_counter()
+            for _ in range(3):
+                at.run()
+            seconds[name] = (time.perf_counter() - start) / 3
+
+        print(
+            f"{n_messages:>5} messages: paginated {seconds['paginated'] * 1e3:7.1f} ms, "
+            f"full {seconds['full'] * 1e3:7.1f} ms per rerun"
+        )
+
+
+def asset_history_app(key: str) -> None:
+    from utils.assets import asset_store
+    from utils.bots import display_chat_history
+    from utils.bots.ctx_mgr import CtxMgr
+
+    ref = asset_store.ref(key, "wordcloud")
+    display_chat_history(
+        CtxMgr("history", [{"role": "assistant", "content": f"Done\n\n{ref}\n\nTop"}])
+    )
+
+
+def test_history_shows_asset_images(monkeypatch, tmp_path) -> None:
+    from PIL import Image
+
+    from utils.assets import AssetStore, asset_store
+
+    monkeypatch.setattr(asset_store, "root", str(tmp_path))
+
+    image = tmp_path / "image.png"
+    Image.new("RGB", (4, 4)).save(image)
+    key = AssetStore(root=str(tmp_path)).put(image.read_bytes(), "png")
+
+    at = AppTest.from_function(asset_history_app, args=(key,)).run()
+
+    message = at.chat_message[0]
+    assert [markdown.value.strip() for markdown in message.markdown] == ["Done", "Top"]
+    assert len(message.get("imgs")) == 1
+    assert not at.exception
@@ -0,0 +1,130 @@
+import pytest
+import streamlit as st
+from google.genai import types
+
+from utils.bots.ctx_mgr import TokenBudgetCtxMgr, estimate_tokens, is_turn_start
+
+
+@pytest.fixture(autouse=True)
+def clear_session_state():
+    st.session_state.clear()
+    yield
+    st.session_state.clear()
+
+
+def user_text(text: str) -> types.Content:
+    return types.Content(role="user", parts=[types.Part.from_text(text=text)])
+
+
+def model_text(text: str) -> types.Content:
+    return types.Content(role="model", parts=[types.Part.from_text(text=text)])
+
+
+def func_call_pair(name: str, result: str) -> list[types.Content]:
+    return [
+        types.Content(
+            role="model",
+            parts=[types.Part.from_function_call(name=name, args={"q": "貓"})],
+        ),
+        types.Content(
+            role="user",
+            parts=[
+                types.Part.from_function_response(
+                    name=name, response={"result": result}
+                )
+            ],
+        ),
+    ]
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens("a" * 400) == 101
+    # 3 UTF-8 bytes per CJK character
+    assert estimate_tokens("貓" * 400) == 301
+    assert estimate_tokens({"role": "user"}) == estimate_tokens('{"role": "user"}')
+    assert estimate_tokens(user_text("a" * 400)) > 100
+
+
+def test_turn_start() -> None:
+    assert is_turn_start(user_text("hi"))
+    assert is_turn_start({"role": "user", "content": "hi"})
+    assert not is_turn_start(model_text("hi"))
+    assert not any(is_turn_start(c) for c in func_call_pair("f", "result"))
+
+
+def test_evicts_whole_turns_to_fit_budget() -> None:
+    ctx = TokenBudgetCtxMgr("test", max_tokens=400)
+    turns = [
+        [user_text(f"question {i} " * 20), *func_call_pair("f", "x" * 200)]
+        for i in range(5)
+    ]
+    for turn in turns:
+        for content in turn:
+            ctx.add_context(content)
+        assert ctx.tokens() <= 400 or ctx.get_context() == turn
+
+    context = ctx.get_context()
+    assert context[-3:] == turns[-1]
+    # Only whole turns are kept, so every function response follows its call
+    assert is_turn_start(context[0])
+    assert len(context) % 3 == 0
+
+
+def test_latest_turn_is_always_kept() -> None:
+    ctx = TokenBudgetCtxMgr("test", max_tokens=10)
+
+    ctx.add_context(user_text("old"))
+    ctx.add_context(user_text("a long question " * 50))
+    ctx.add_context(model_text("a long answer " * 50))
+
+    assert [c.parts[0].text[:6] for c in ctx.get_context()] == ["a long", "a long"]
+
+
+def test_compacts_past_turns() -> None:
+    def compact(content: types.Content) -> types.Content:
+        if content.parts[0].function_response:
+            return func_call_pair("f", "cut")[1]
+        return content
+
+    ctx = TokenBudgetCtxMgr("test", max_tokens=10_000, compact=compact)
+    for content in [user_text("q1"), *func_call_pair("f", "x" * 4000)]:
+        ctx.add_context(content)
+    tokens = ctx.tokens()
+    # The current turn keeps the full response
+    assert ctx.get_context()[-1].parts[0].function_response.response == {
+        "result": "x" * 4000
+    }
+
+    ctx.add_context(user_text("q2"))
+
+    assert ctx.get_context()[2].parts[0].function_response.response == {"result": "cut"}
+    assert ctx.tokens() < tokens - 900
+
+
+def test_summarizes_evicted_turns() -> None:
+    evicted = []
+
+    def summarize(contents: list) -> list:
+        evicted.append(contents)
+        return [user_text(f"summary of {len(contents)}")]
+
+    ctx = TokenBudgetCtxMgr("test", max_tokens=100, summarize=summarize)
+    ctx.add_context(user_text("q1 " * 50))
+    ctx.add_context(model_text("a1 " * 50))
+    ctx.add_context(user_text("q2"))
+
+    assert evicted == [[user_text("q1 " * 50), model_text("a1 " * 50)]]
+    assert ctx.get_context() == [user_text("summary of 2"), user_text("q2")]
+
+
+def test_clear_and_empty() -> None:
+    ctx = TokenBudgetCtxMgr("test")
+    assert ctx.empty()
+
+    ctx.add_context(user_text("hi"))
+    assert not ctx.empty()
+    assert TokenBudgetCtxMgr("test").get_context() == [user_text("hi")]
+
+    ctx.clear_context()
+    assert ctx.empty()
+    assert ctx.tokens() == 0
@@ -0,0 +1,70 @@
+import threading
+
+import numpy as np
+import pytest
+from pytest_mock import MockFixture
+
+from utils import genai_client
+from utils.genai_client import StubGenaiClient, clear_genai_clients, get_genai_client
+
+
+@pytest.fixture(autouse=True)
+def stub_backend(monkeypatch):
+    monkeypatch.setenv("GEMINI_CLIENT_BACKEND", "stub")
+    clear_genai_clients()
+    yield
+    clear_genai_clients()
+
+
+def test_client_reused_per_api_key() -> None:
+    client = get_genai_client("key-a")
+
+    assert isinstance(client, StubGenaiClient)
+    assert get_genai_client("key-a") is client
+    assert get_genai_client("key-b") is not client
+
+
+def test_default_api_key_from_env(monkeypatch) -> None:
+    monkeypatch.setenv("GEMINI_API_KEY", "key-env")
+
+    assert get_genai_client() is get_genai_client("key-env")
+
+
+def test_concurrent_callers_share_one_client(mocker: MockFixture) -> None:
+    factory = mocker.Mock(side_effect=StubGenaiClient)
+    mocker.patch.dict(genai_client._client_factories, {"stub": factory})
+
+    clients = []
+    threads = [
+        threading.Thread(target=lambda: clients.append(get_genai_client("key")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    factory.assert_called_once_with("key")
+    assert all(client is clients[0] for client in clients)
+
+
+def test_unknown_backend(monkeypatch) -> None:
+    monkeypatch.setenv("GEMINI_CLIENT_BACKEND", "unknown")
+
+    with pytest.raises(ValueError):
+        get_genai_client("key")
+
+
+def test_stub_client_responses() -> None:
+    models = get_genai_client("key").models
+
+    single = models.embed_content(model="m", contents="貓").embeddings[0].values
+    batch = models.embed_content(model="m", contents=["貓", "狗"]).embeddings
+
+    assert len(single) == 768
+    assert np.linalg.norm(single) == pytest.approx(1.0)
+    assert batch[0].values == single
+    assert batch[1].values != single
+
+    stream = models.generate_content_stream(model="m", contents=[])
+    assert "".join(chunk.text for chunk in stream)
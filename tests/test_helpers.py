@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from utils import helpers
+from utils.helpers import str_stream
+
+TEXT = "Cats purr. 貓咪很親人！"
+
+
+@pytest.mark.parametrize("mode", ["paced", "char", "word", "passthrough"])
+def test_str_stream_modes_keep_text(mode: str) -> None:
+    assert "".join(str_stream(TEXT, mode=mode)) == TEXT
+    assert list(str_stream("", mode=mode)) == []
+
+
+def test_str_stream_pieces() -> None:
+    assert list(str_stream(TEXT, mode="char")) == list(TEXT)
+    assert list(str_stream(TEXT, mode="word")) == [
+        "Cats",
+        " purr",
+        ".",
+        " 貓",
+        "咪",
+        "很",
+        "親",
+        "人",
+        "！",
+    ]
+    assert list(str_stream(TEXT, mode="passthrough")) == [TEXT]
+
+
+def test_str_stream_mode_from_env(monkeypatch) -> None:
+    monkeypatch.setenv(helpers.STREAM_MODE_ENV, "passthrough")
+    assert list(str_stream(TEXT)) == [TEXT]
+
+    monkeypatch.setenv(helpers.STREAM_MODE_ENV, "typewriter")
+    with pytest.raises(ValueError):
+        list(str_stream(TEXT))
+
+
+def test_paced_stream_delay_is_bounded(monkeypatch) -> None:
+    monkeypatch.setattr(helpers, "STREAM_PACE_BUDGET", 0.05)
+
+    # Short texts are typed character by character
+    assert list(str_stream("abc", mode="paced")) == ["a", "b", "c"]
+
+    text = "貓" * 4000
+    start = time.perf_counter()
+    pieces = list(str_stream(text, mode="paced"))
+    seconds = time.perf_counter() - start
+
+    assert len(pieces) == 10
+    # 20 seconds in "char" mode
+    assert seconds < 0.5
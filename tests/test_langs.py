@@ -1,6 +1,9 @@
+import gzip
+import threading
 import time
 from unittest.mock import PropertyMock
 
+import numpy as np
 import pandas as pd
 import pytest
 import streamlit as st
@@ -11,6 +14,8 @@ from utils.i18n import I18n
 
 i18n = I18n(lang="en")
 
+SAMPLE_JSONL = b'{"sentence": "Sample sentence is a sentence"}\n"Another sentence"\n'
+
 
 @pytest.mark.parametrize(
     "init_lang",
@@ -132,6 +137,58 @@ def test_week10_2d_3d_not_empty_has_selection(
     assert not at.exception
 
 
+@pytest.mark.parametrize(
+    ("page_path", "n_components"),
+    [
+        ("word2vec-2d", 2),
+        ("word2vec-3d", 3),
+    ],
+)
+def test_week10_2d_3d_background_layout(
+    mocker: MockFixture, page_path: str, n_components: int
+) -> None:
+    from utils.week10 import projection
+
+    mocker.patch.object(
+        type(st.context), "locale", new_callable=PropertyMock, return_value="en"
+    )
+
+    sample_df = pd.DataFrame(
+        [
+            {"selected": True, "sentence": "Sample sentence is a sentence"},
+            {"selected": True, "sentence": "Another sentence"},
+        ],
+        columns=["selected", "sentence"],
+    )
+    mocker.patch("utils.week10.df_input", return_value=sample_df)
+
+    release = threading.Event()
+
+    def slow_tsne(vectors, n):
+        release.wait(10)
+        return np.zeros((len(vectors), n))
+
+    mocker.patch.dict(projection._PROJECTIONS, {"tsne": slow_tsne})
+
+    at = AppTest.from_file("../src/streamlit_app.py", default_timeout=30).run()
+    at.switch_page(f"./pages/{page_path}.py").run()
+    assert len(at.info) == 0
+
+    # The PCA projection is shown while t-SNE is computed
+    at.radio(key="projection_method").set_value("tsne").run()
+    assert at.info[0].value == i18n("week10.projection.pending")
+
+    release.set()
+    for _ in range(50):
+        time.sleep(0.1)
+        if not projection._pending:
+            break
+    at.run()
+    assert len(at.info) == 0
+
+    assert not at.exception
+
+
 @pytest.mark.parametrize(
     "page_path",
     [
@@ -192,6 +249,54 @@ def test_week10_similarity_not_empty(mocker: MockFixture, page_path: str) -> Non
     assert not at.exception
 
 
+@pytest.mark.parametrize(
+    "page_path",
+    [
+        "word2vec-cbow",
+        "word2vec-skip-gram",
+    ],
+)
+@pytest.mark.parametrize(
+    ("file_name", "content", "has_error"),
+    [
+        ("corpus.jsonl", SAMPLE_JSONL, False),
+        ("corpus.jsonl.gz", gzip.compress(SAMPLE_JSONL), False),
+        ("corpus.jsonl", b"not json\n", True),
+        # Corrupt (OSError), then truncated (EOFError) gzip streams
+        ("corpus.txt.gz", b"\x1f\x8bjunk", True),
+        ("corpus.jsonl.gz", gzip.compress(SAMPLE_JSONL * 50)[:-20], True),
+    ],
+    ids=["jsonl", "jsonl-gz", "invalid-json", "corrupt-gz", "truncated-gz"],
+)
+def test_week10_similarity_uploaded_corpus(
+    mocker: MockFixture,
+    page_path: str,
+    file_name: str,
+    content: bytes,
+    has_error: bool,
+) -> None:
+    mocker.patch.object(
+        type(st.context), "locale", new_callable=PropertyMock, return_value="en"
+    )
+
+    corpus_file = mocker.Mock(getvalue=lambda: content)
+    corpus_file.name = file_name
+    mocker.patch("utils.week10.corpus_file_input", return_value=corpus_file)
+
+    at = AppTest.from_file("../src/streamlit_app.py", default_timeout=30).run()
+    at.switch_page(f"./pages/{page_path}.py").run()
+
+    # The uploaded file takes precedence over the empty table
+    assert len(at.warning) == 0
+    if has_error:
+        assert len(at.error) == 1
+    else:
+        options = at.selectbox(key="select_similar_word").options
+        assert sorted(options) == ["another", "is", "sample", "sentence"]
+
+    assert not at.exception
+
+
 @pytest.mark.parametrize(
     "page_path",
     [
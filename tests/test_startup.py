@@ -0,0 +1,78 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils.import_report import import_time_report
+
+HEAVY_MODULES = [
+    "torch",
+    "ckip_transformers",
+    "wordcloud",
+    "matplotlib",
+    "sklearn",
+    "gensim",
+    "google.genai.types",
+]
+
+
+def loaded_modules(module: str) -> list[str]:
+    """Import the module in a fresh interpreter and return the heavy modules loaded."""
+    code = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    res = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env
+    )
+    assert res.returncode == 0, res.stderr
+    return json.loads(res.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["utils.function_call", "utils.genai_client", "utils.week10", "utils.bots"],
+)
+def test_heavy_dependencies_are_imported_lazily(module: str) -> None:
+    assert loaded_modules(module) == []
+
+
+def test_import_time_report() -> None:
+    report = import_time_report("utils.cache")
+
+    assert "utils" in report
+    assert list(report.values()) == sorted(report.values(), reverse=True)
+
+
+@pytest.mark.performance
+def test_benchmark_startup() -> None:
+    code = (
+        "import time; start = time.perf_counter(); "
+        "from unittest.mock import PropertyMock, patch; "
+        "import streamlit as st; "
+        "from streamlit.testing.v1 import AppTest; "
+        "patch.object(type(st.context), 'locale', new_callable=PropertyMock, "
+        "return_value='en').start(); "
+        "at = AppTest.from_file('src/streamlit_app.py', default_timeout=120).run(); "
+        "assert not at.exception; "
+        "print(time.perf_counter() - start)"
+    )
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(sys.path),
+        "CKIP_WARMUP": "0",
+    }
+    res = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env
+    )
+    assert res.returncode == 0, res.stderr
+
+    print()
+    print(f"streamlit_app.py cold start: {float(res.stdout.splitlines()[-1]):.2f} s")
+    for module in ["utils.function_call", "utils.week10"]:
+        report = import_time_report(module)
+        top = ", ".join(f"{p} {s:.2f} s" for p, s in list(report.items())[:5])
+        print(f"import {module}: {sum(report.values()):.2f} s ({top})")
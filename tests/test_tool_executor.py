@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+
+import pytest
+
+from utils.function_call import tool_executor
+from utils.function_call.tool_executor import ToolTimeoutError, run_tool, submit_tool
+
+
+@pytest.fixture(autouse=True, scope="module")
+def tool_pool():
+    # One worker, started once for the module (spawning imports the tool modules)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(tool_executor, "TOOL_PROCESS_WORKERS", 1)
+        yield
+    tool_executor.shutdown_tool_pool()
+
+
+def sleep(seconds: float) -> float:
+    """A picklable tool taking keyword arguments."""
+    time.sleep(seconds)
+    return seconds
+
+
+def test_run_tool_in_worker_process() -> None:
+    assert run_tool(pow, {"base": 2, "exp": 10}) == 1024
+    assert tool_executor.get_tool_pool() is tool_executor.get_tool_pool()
+
+
+def test_run_tool_raises_tool_errors() -> None:
+    with pytest.raises(ValueError):
+        run_tool(json.loads, {"s": "not json"})
+
+
+def test_run_tool_timeout_cancels_pending_calls() -> None:
+    # Occupies the only worker, so the next call stays pending
+    running = submit_tool(sleep, {"seconds": 1})
+
+    start = time.perf_counter()
+    with pytest.raises(ToolTimeoutError):
+        run_tool(pow, {"base": 2, "exp": 10}, timeout=0.1)
+    assert time.perf_counter() - start < 1
+
+    assert running.result() == 1
+
+
+def test_waiting_does_not_block_other_threads() -> None:
+    ticks = []
+    stop = threading.Event()
+
+    def tick() -> None:
+        while not stop.is_set():
+            ticks.append(time.perf_counter())
+            time.sleep(0.01)
+
+    ticker = threading.Thread(target=tick)
+    ticker.start()
+    run_tool(sleep, {"seconds": 0.5})
+    stop.set()
+    ticker.join()
+
+    assert len(ticks) > 10
+
+
+def test_inline_when_pool_disabled(monkeypatch) -> None:
+    monkeypatch.setattr(tool_executor, "TOOL_PROCESS_WORKERS", 0)
+
+    assert run_tool(threading.get_ident, {}) == threading.get_ident()
+
+
+def test_start_tool_workers() -> None:
+    tool_executor.start_tool_workers()
+
+    pool = tool_executor.get_tool_pool()
+    assert len(pool._processes) == tool_executor.TOOL_PROCESS_WORKERS
+
+
+def test_workers_warm_up_ckip(mocker, monkeypatch) -> None:
+    warm_up = mocker.patch("utils.function_call.wordcloud.warm_up_ckip_models")
+
+    monkeypatch.setenv("CKIP_WARMUP", "1")
+    tool_executor._init_worker()
+    warm_up.assert_called_once()
+
+    monkeypatch.setenv("CKIP_WARMUP", "0")
+    tool_executor._init_worker()
+    warm_up.assert_called_once()
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_setup_warmup_loads_models_in_one_place(mocker, monkeypatch, workers) -> None:
+    import streamlit_app
+
+    monkeypatch.setenv("CKIP_WARMUP", "1")
+    monkeypatch.setattr(tool_executor, "TOOL_PROCESS_WORKERS", workers)
+    start_workers = mocker.patch.object(tool_executor, "start_tool_workers")
+    thread = mocker.patch("threading.Thread")
+
+    streamlit_app.setup_warmup.clear()
+    streamlit_app.setup_warmup()
+    streamlit_app.setup_warmup.clear()
+
+    # In the tool workers when they run the tools, else in this process
+    assert start_workers.called == (workers > 0)
+    assert thread.called == (workers == 0)
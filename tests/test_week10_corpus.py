@@ -0,0 +1,149 @@
+import gzip
+import json
+from io import BytesIO
+
+import pytest
+from gensim.models import Word2Vec
+
+from utils.cache import LRUCache
+from utils.week10 import word2vec
+from utils.week10.corpus import StreamingCorpus, corpus_format
+from utils.week10.helpers import corpus_file_variants
+from utils.week10.word2vec import (
+    tokenize_corpus,
+    train_word2vec,
+    train_word2vec_variants,
+)
+
+CORPUS = [
+    "The cat sat on the mat.",
+    "The dog chased the cat.",
+    "Cats and dogs are friends.",
+]
+CONFIG = {"vector_size": 20, "window": 3, "min_count": 1, "workers": 1, "seed": 1}
+
+
+@pytest.fixture(autouse=True)
+def model_cache(monkeypatch) -> LRUCache:
+    cache = LRUCache(max_entries=4, max_weight=2**20, weigher=word2vec.word2vec_nbytes)
+    monkeypatch.setattr(word2vec, "word2vec_model_cache", cache)
+    return cache
+
+
+def file_content(file_format: str) -> bytes:
+    if file_format == "csv":
+        rows = ["selected,sentence", *(f'True,"{s}"' for s in CORPUS), "False,skip me"]
+        return "\n".join(rows).encode()
+    if file_format == "jsonl":
+        lines = [json.dumps({"sentence": CORPUS[0]}), *map(json.dumps, CORPUS[1:])]
+        return "\n\n".join(lines).encode()
+    return "\n".join([*CORPUS, ""]).encode()
+
+
+def test_corpus_format() -> None:
+    assert corpus_format("corpus.txt") == "txt"
+    assert corpus_format("Corpus.JSONL.gz") == "jsonl"
+    assert corpus_format("corpus") == "txt"
+    with pytest.raises(ValueError):
+        corpus_format("corpus.xlsx")
+
+
+@pytest.mark.parametrize("file_format", ["txt", "csv", "jsonl"])
+@pytest.mark.parametrize("compress", [False, True])
+def test_streams_sentences(file_format: str, compress: bool) -> None:
+    data = file_content(file_format)
+    file_name = f"corpus.{file_format}"
+    if compress:
+        data, file_name = gzip.compress(data), f"{file_name}.gz"
+
+    corpus = StreamingCorpus.from_bytes(data, file_name)
+
+    assert list(corpus) == tokenize_corpus(CORPUS)
+    # Restartable: every pass re-reads the file
+    assert list(corpus) == list(corpus)
+
+
+def test_streams_ragged_csv() -> None:
+    # Rows shorter than the "selected" or "sentence" column
+    data = f'sentence,selected\n"{CORPUS[0]}"\n\n"{CORPUS[1]}",True\nskip me,0\n'
+
+    corpus = StreamingCorpus.from_bytes(data.encode(), "corpus.csv")
+
+    assert list(corpus) == tokenize_corpus(CORPUS[:2])
+
+
+def test_streams_from_path(tmp_path) -> None:
+    path = tmp_path / "corpus.txt.gz"
+    path.write_bytes(gzip.compress(file_content("txt")))
+
+    corpus = StreamingCorpus.from_path(str(path), is_remove_stopwords=True)
+
+    assert list(corpus) == tokenize_corpus(CORPUS, is_remove_stopwords=True)
+
+
+def test_cache_key() -> None:
+    data = file_content("txt")
+    corpus = StreamingCorpus.from_bytes(data, "corpus.txt")
+
+    assert corpus.cache_key == StreamingCorpus.from_bytes(data, "a.txt").cache_key
+    assert (
+        corpus.cache_key
+        != StreamingCorpus.from_bytes(data, "a.txt", is_remove_stopwords=True).cache_key
+    )
+    assert corpus.cache_key != StreamingCorpus.from_bytes(data[1:], "a.txt").cache_key
+
+
+def test_train_from_stream_with_epoch_progress(model_cache) -> None:
+    opened = []
+    data = file_content("txt")
+    corpus = StreamingCorpus(lambda: opened.append(1) or BytesIO(data), "txt")
+    epochs = []
+
+    model = train_word2vec(
+        corpus, on_epoch=lambda *args: epochs.append(args), **CONFIG, epochs=3
+    )
+
+    assert isinstance(model, Word2Vec)
+    assert set(model.wv.index_to_key) == {w for s in tokenize_corpus(CORPUS) for w in s}
+    assert epochs == [(1, 3), (2, 3), (3, 3)]
+    assert model.callbacks == ()
+    # One vocabulary pass, one pass per epoch and one read to hash the content
+    assert len(opened) == 5
+
+    assert train_word2vec(corpus, **CONFIG, epochs=3) is model
+    assert model_cache.stats()["hits"] == 1
+
+
+def test_variants_report_progress() -> None:
+    data = file_content("txt")
+    variants = {
+        "original": StreamingCorpus.from_bytes(data, "corpus.txt"),
+        "rm_stopwords": StreamingCorpus.from_bytes(
+            data, "corpus.txt", is_remove_stopwords=True
+        ),
+    }
+    reports = []
+
+    config = {k: v for k, v in CONFIG.items() if k != "workers"}
+    results = train_word2vec_variants(
+        variants, worker_budget=2, progress=reports.append, **config
+    )
+
+    assert set(results) == set(variants)
+    assert reports[-1] == {"original": 1.0, "rm_stopwords": 1.0}
+    assert all(0 <= done <= 1 for report in reports for done in report.values())
+
+
+def test_corpus_file_variants(mocker) -> None:
+    corpus_file = mocker.Mock(getvalue=lambda: file_content("csv"))
+    corpus_file.name = "corpus.csv"
+
+    variants = corpus_file_variants(corpus_file)
+
+    assert list(variants["original"]) == tokenize_corpus(CORPUS)
+    assert list(variants["rm_stopwords"]) == tokenize_corpus(
+        CORPUS, is_remove_stopwords=True
+    )
+
+    corpus_file.getvalue = lambda: b"selected,sentence\nFalse,skip me\n"
+    assert corpus_file_variants(corpus_file) is None
@@ -0,0 +1,177 @@
+import itertools
+import json
+import random
+import time
+from unittest.mock import PropertyMock
+
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+from pytest_mock import MockFixture
+from streamlit.testing.v1 import AppTest
+
+from utils.helpers import color_map
+from utils.week10 import (
+    first_sentence_indices,
+    merged_sentence_lines,
+    sentence_word_colors,
+    sentence_word_indices,
+)
+
+SENTENCES = [["the", "cat", "sat"], [], ["the", "dog"], ["dog", "cat", "ran"]]
+KEY_TO_INDEX = {"the": 0, "cat": 1, "dog": 2, "sat": 3, "ran": 4, "unused": 5}
+
+
+def naive_word_colors(sentences: list, key_to_index: dict) -> list[str]:
+    # The former nested scan of draw_2d / draw_3d
+    word_colors = []
+    for word in key_to_index:
+        for i, sentence in enumerate(sentences):
+            if word in sentence:
+                word_colors.append(color_map[i % len(color_map)])
+                break
+    return word_colors
+
+
+def random_sentences(n_sentences: int, vocab_size: int = 5000) -> list[list[str]]:
+    rng = random.Random(0)
+    vocab = [f"word{i}" for i in range(vocab_size)]
+    return [rng.choices(vocab, k=rng.randint(0, 15)) for _ in range(n_sentences)]
+
+
+def test_first_sentence_indices() -> None:
+    assert first_sentence_indices(SENTENCES, KEY_TO_INDEX).tolist() == [
+        0,
+        0,
+        2,
+        0,
+        3,
+        -1,
+    ]
+    assert first_sentence_indices([], {"a": 0}).tolist() == [-1]
+
+
+def test_sentence_word_colors_match_naive_scan() -> None:
+    sentences = random_sentences(300, vocab_size=200)
+    key_to_index = {
+        word: i
+        for i, word in enumerate(
+            dict.fromkeys(itertools.chain.from_iterable(sentences))
+        )
+    }
+
+    assert sentence_word_colors(sentences, key_to_index, color_map) == (
+        naive_word_colors(sentences, key_to_index)
+    )
+
+
+def test_sentence_word_indices() -> None:
+    sentences = [*SENTENCES, ["cat", "unknown", "the"]]
+    indices = sentence_word_indices(sentences, KEY_TO_INDEX)
+
+    assert [i.tolist() for i in indices] == [[0, 1, 3], [], [0, 2], [2, 1, 4], [1, 0]]
+    vectors = np.arange(12).reshape(6, 2)
+    assert vectors[indices[2]].tolist() == [[0, 1], [4, 5]]
+
+
+def test_merged_sentence_lines() -> None:
+    points = np.arange(10).reshape(5, 2)
+    indices = [np.array([0, 1]), np.array([2]), np.array([3, 4]), np.array([], int)]
+
+    lines = merged_sentence_lines(points, indices, n_groups=2)
+
+    assert list(lines) == [0, 1]
+    # Sentences 0 and 2, each followed by a gap
+    np.testing.assert_array_equal(
+        lines[0],
+        [[0, 1], [2, 3], [np.nan, np.nan], [6, 7], [8, 9], [np.nan, np.nan]],
+    )
+    np.testing.assert_array_equal(lines[1], [[4, 5], [np.nan, np.nan], [np.nan] * 2])
+
+
+@pytest.mark.parametrize("n_sentences", [3, 150])
+def test_2d_line_traces_merged_above_threshold(
+    mocker: MockFixture, n_sentences: int
+) -> None:
+    mocker.patch.object(
+        type(st.context), "locale", new_callable=PropertyMock, return_value="en"
+    )
+    sentences = [f"cat dog word{i} sentence{i}" for i in range(n_sentences)]
+    mocker.patch(
+        "utils.week10.df_input",
+        return_value=pd.DataFrame({"selected": True, "sentence": sentences}),
+    )
+
+    at = AppTest.from_file("../src/streamlit_app.py", default_timeout=30).run()
+    at.switch_page("./pages/word2vec-2d.py").run()
+
+    assert not at.exception
+    traces = json.loads(at.get("plotly_chart")[0].proto.spec)["data"]
+    line_types = [trace["type"] for trace in traces[1:]]
+    if n_sentences == 3:
+        assert line_types == ["scatter"] * 3
+    else:
+        assert line_types == ["scattergl"] * len(color_map)
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("n_sentences", [10_000, 100_000])
+def test_benchmark_sentence_word_colors(n_sentences: int) -> None:
+    # A vocabulary growing with the corpus, so many words first occur late
+    sentences = random_sentences(n_sentences, vocab_size=n_sentences)
+    key_to_index = {
+        word: i
+        for i, word in enumerate(
+            dict.fromkeys(itertools.chain.from_iterable(sentences))
+        )
+    }
+
+    start = time.perf_counter()
+    sentence_word_colors(sentences, key_to_index, color_map)
+    sentence_word_indices(sentences, key_to_index)
+    seconds = time.perf_counter() - start
+
+    # The nested scan is timed on an evenly spaced sample of the vocabulary (ordered
+    # by first occurrence), then extrapolated
+    sample = dict(list(key_to_index.items())[:: len(key_to_index) // 100])
+    start = time.perf_counter()
+    naive_word_colors(sentences, sample)
+    naive_seconds = (time.perf_counter() - start) * len(key_to_index) / len(sample)
+
+    print(
+        f"\n{n_sentences} sentences, {len(key_to_index)} words: "
+        f"{seconds * 1e3:.1f} ms, nested scan ~{naive_seconds:.1f} s"
+    )
+
+
+@pytest.mark.performance
+def test_benchmark_line_trace_payload() -> None:
+    import plotly.graph_objs as go
+
+    sentences = random_sentences(5000, vocab_size=2000)
+    key_to_index = {
+        word: i for i, word in enumerate(dict.fromkeys(itertools.chain(*sentences)))
+    }
+    points = np.random.default_rng(0).standard_normal((len(key_to_index), 2))
+    indices = sentence_word_indices(sentences, key_to_index)
+
+    per_sentence = go.Figure(
+        [go.Scatter(x=points[i][:, 0], y=points[i][:, 1]) for i in indices]
+    )
+    merged = go.Figure(
+        [
+            go.Scattergl(x=line[:, 0], y=line[:, 1])
+            for line in merged_sentence_lines(points, indices, len(color_map)).values()
+        ]
+    )
+
+    print()
+    for name, fig in [("per sentence", per_sentence), ("merged", merged)]:
+        start = time.perf_counter()
+        payload = fig.to_json()
+        seconds = time.perf_counter() - start
+        print(
+            f"{name:>12}: {len(fig.data):5} traces, {len(payload) / 2**20:6.2f} MiB, "
+            f"serialized in {seconds * 1e3:.0f} ms"
+        )
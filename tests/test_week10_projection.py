@@ -0,0 +1,128 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.cache import LRUCache
+from utils.week10 import projection
+from utils.week10.projection import pca, project, project_in_background, tsne
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch) -> LRUCache:
+    cache = LRUCache(max_entries=8, max_weight=2**26, weigher=lambda a: a.nbytes)
+    monkeypatch.setattr(projection, "projection_cache", cache)
+    return cache
+
+
+def random_vectors(n_words: int, vector_size: int = 100, seed: int = 0) -> np.ndarray:
+    return (
+        np.random.default_rng(seed)
+        .normal(size=(n_words, vector_size))
+        .astype(np.float32)
+    )
+
+
+def test_pca_matches_sklearn() -> None:
+    from sklearn.decomposition import PCA
+
+    vectors = random_vectors(50)
+    expected = PCA(n_components=2).fit_transform(vectors)
+
+    points = pca(vectors, 2)
+
+    assert points.shape == (50, 2)
+    # Principal components are defined up to their sign
+    assert np.allclose(np.abs(points), np.abs(expected), atol=1e-4)
+
+
+def test_pca_pads_small_vocabularies() -> None:
+    points = pca(random_vectors(2), 3)
+
+    assert points.shape == (2, 3)
+    assert (points[:, 2] == 0).all()
+
+
+def test_randomized_pca_for_large_vocabularies(mocker, monkeypatch) -> None:
+    from sklearn.decomposition import PCA
+
+    monkeypatch.setattr(projection, "RANDOMIZED_PCA_MIN_WORDS", 100)
+    fit = mocker.spy(PCA, "fit_transform")
+
+    pca(random_vectors(99), 2)
+    pca(random_vectors(100), 2)
+
+    assert [call.args[0].svd_solver for call in fit.call_args_list] == [
+        "full",
+        "randomized",
+    ]
+
+
+def test_tsne() -> None:
+    assert tsne(random_vectors(40), 2).shape == (40, 2)
+    # Too few words for t-SNE
+    assert tsne(random_vectors(3), 3).shape == (3, 3)
+
+
+def test_project_is_cached(cache) -> None:
+    vectors = random_vectors(50)
+
+    points = project(vectors, 2)
+
+    assert project(vectors.copy(), 2) is points
+    assert project(vectors, 3) is not points
+    assert cache.stats()["hits"] == 1
+    with pytest.raises(ValueError):
+        project(vectors, 2, "umap")
+
+
+def test_project_in_background(mocker) -> None:
+    vectors = random_vectors(50)
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_tsne(*args) -> np.ndarray:
+        started.set()
+        release.wait(5)
+        return np.zeros((50, 2))
+
+    mocker.patch.dict(projection._PROJECTIONS, {"tsne": slow_tsne})
+
+    assert project_in_background(vectors, 2, "tsne") is None
+    assert started.wait(5)
+    # Asking again does not start another computation
+    assert project_in_background(vectors, 2, "tsne") is None
+    assert len(projection._pending) == 1
+
+    release.set()
+    for _ in range(50):
+        if (points := project_in_background(vectors, 2, "tsne")) is not None:
+            break
+        time.sleep(0.1)
+    assert points.shape == (50, 2)
+    assert not projection._pending
+
+
+@pytest.mark.performance
+def test_benchmark_large_vocabulary() -> None:
+    from sklearn.decomposition import PCA
+
+    vectors = random_vectors(50_000)
+
+    start = time.perf_counter()
+    PCA(n_components=3, svd_solver="full").fit_transform(vectors)
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    project(vectors, 2)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    project(vectors, 2)
+    cached = time.perf_counter() - start
+
+    print(
+        f"\n50k words: full PCA(3) {full:.2f} s, randomized PCA(2) {first:.2f} s, "
+        f"cached {cached * 1000:.1f} ms"
+    )
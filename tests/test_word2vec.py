@@ -0,0 +1,196 @@
+import random
+import time
+
+import pytest
+from gensim.models import Word2Vec
+
+from utils.cache import LRUCache
+from utils.week10 import word2vec
+from utils.week10.word2vec import (
+    appended_sentences,
+    corpus_hash,
+    tokenize_corpus,
+    train_word2vec,
+    train_word2vec_variants,
+)
+
+CORPUS = [
+    "The cat sat on the mat.",
+    "The dog chased the cat.",
+    "Cats and dogs are friends.",
+]
+CONFIG = {"vector_size": 20, "window": 3, "min_count": 1, "workers": 1, "seed": 1}
+
+
+@pytest.fixture(autouse=True)
+def model_cache(monkeypatch) -> LRUCache:
+    cache = LRUCache(max_entries=4, max_weight=2**20, weigher=word2vec.word2vec_nbytes)
+    monkeypatch.setattr(word2vec, "word2vec_model_cache", cache)
+    return cache
+
+
+def test_tokenize_corpus() -> None:
+    assert tokenize_corpus(CORPUS)[0] == ["the", "cat", "sat", "on", "the", "mat"]
+    # gensim's remove_stopwords is case-sensitive
+    assert tokenize_corpus(CORPUS, is_remove_stopwords=True)[0] == [
+        "the",
+        "cat",
+        "sat",
+        "mat",
+    ]
+
+
+def test_corpus_hash() -> None:
+    tokens = tokenize_corpus(CORPUS)
+
+    assert corpus_hash(tokens) == corpus_hash(tokenize_corpus(list(CORPUS)))
+    assert corpus_hash(tokens) != corpus_hash(tokens[::-1])
+    # Token boundaries matter
+    assert corpus_hash([["ab", "c"]]) != corpus_hash([["a", "bc"]])
+
+
+def test_model_reused_for_same_corpus_and_config(model_cache) -> None:
+    tokens = tokenize_corpus(CORPUS)
+
+    model = train_word2vec(tokens, **CONFIG)
+    assert isinstance(model, Word2Vec)
+    assert train_word2vec(tokenize_corpus(CORPUS), **CONFIG) is model
+
+    assert train_word2vec(tokens, **{**CONFIG, "sg": 1}) is not model
+    assert train_word2vec(tokens[:2], **CONFIG) is not model
+    assert model_cache.stats()["hits"] == 1
+
+
+def test_model_cache_bounded_by_size(model_cache) -> None:
+    tokens = tokenize_corpus(CORPUS)
+    model = train_word2vec(tokens, **CONFIG)
+    nbytes = word2vec.word2vec_nbytes(model)
+    assert nbytes >= model.wv.vectors.nbytes * 2
+
+    # A model larger than the whole budget is not kept
+    model_cache.max_weight = nbytes - 1
+    model_cache.clear()
+    train_word2vec(tokens, **CONFIG)
+    assert len(model_cache) == 0
+
+
+def test_variants_share_worker_budget(mocker) -> None:
+    train = mocker.spy(word2vec, "train_word2vec")
+    variants = {
+        "original": tokenize_corpus(CORPUS),
+        "rm_stopwords": tokenize_corpus(CORPUS, is_remove_stopwords=True),
+    }
+    config = {k: v for k, v in CONFIG.items() if k != "workers"}
+
+    results = train_word2vec_variants(variants, worker_budget=5, **config)
+
+    assert list(results) == ["original", "rm_stopwords"]
+    assert all(call.kwargs["workers"] == 2 for call in train.call_args_list)
+    model, seconds = results["rm_stopwords"]
+    assert "is" not in model.wv.key_to_index
+    assert seconds > 0
+
+    # The worker split does not change the cache key
+    assert (
+        train_word2vec(variants["original"], **config, workers=1)
+        is (results["original"][0])
+    )
+
+
+def test_appended_sentences() -> None:
+    tokens = tokenize_corpus(CORPUS)
+
+    assert appended_sentences(tokens[:2], tokens) == tokens[2:]
+    assert appended_sentences(tokens, tokens) == []
+    # Deleted, changed or reordered sentences
+    assert appended_sentences(tokens, tokens[:2]) is None
+    assert appended_sentences(tokens[:2], [tokens[0], ["changed"], tokens[2]]) is None
+    assert appended_sentences(tokens[:2], tokens[::-1]) is None
+
+
+def test_appending_sentences_updates_cached_model(mocker) -> None:
+    tokens = tokenize_corpus(CORPUS)
+    base = train_word2vec(tokens[:2], **CONFIG)
+    base_vectors = base.wv.vectors.copy()
+    build_vocab = mocker.spy(Word2Vec, "build_vocab")
+    epochs = []
+
+    model = train_word2vec(
+        tokens,
+        on_epoch=lambda *args: epochs.append(args),
+        previous=tokens[:2],
+        **CONFIG,
+    )
+
+    # Only the new sentence is added to the vocabulary and trained on
+    build_vocab.assert_called_once_with(model, tokens[2:], update=True)
+    assert model is not base
+    assert {"cats", "dogs", "friends"} <= set(model.wv.key_to_index)
+    assert len(epochs) == base.epochs
+    # The shared cached model is left untouched
+    assert "friends" not in base.wv.key_to_index
+    assert (base.wv.vectors == base_vectors).all()
+
+    assert train_word2vec(tokens, **CONFIG) is model
+
+
+def test_changed_sentences_retrain_from_scratch(mocker) -> None:
+    tokens = tokenize_corpus(CORPUS)
+    train_word2vec(tokens, **CONFIG)
+    deepcopy = mocker.spy(word2vec.copy, "deepcopy")
+
+    # A deleted sentence, then a model of the previous corpus that is not cached
+    train_word2vec(tokens[1:], previous=tokens, **CONFIG)
+    train_word2vec(tokens + [["new"]], previous=tokens[:1], **CONFIG)
+
+    deepcopy.assert_not_called()
+
+
+def random_corpus(n_sentences: int, seed: int) -> list[list[str]]:
+    rng = random.Random(seed)
+    vocab = [f"word{i}" for i in range(5000)]
+    return [rng.choices(vocab, k=20) for _ in range(n_sentences)]
+
+
+@pytest.mark.performance
+def test_benchmark_concurrent_variants() -> None:
+    variants = {"a": random_corpus(20_000, 0), "b": random_corpus(20_000, 1)}
+    config = {"vector_size": 100, "window": 5, "min_count": 1}
+    budget = word2vec.WORD2VEC_WORKER_BUDGET
+
+    start = time.perf_counter()
+    for tokens in variants.values():
+        Word2Vec(tokens, **config, workers=budget // 2 or 1)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = train_word2vec_variants(variants, worker_budget=budget, **config)
+    concurrent = time.perf_counter() - start
+
+    per_model = ", ".join(f"{name} {s:.2f} s" for name, (_, s) in results.items())
+    print(
+        f"\n{budget} workers: sequential {sequential:.2f} s, "
+        f"concurrent {concurrent:.2f} s ({per_model})"
+    )
+
+
+@pytest.mark.performance
+def test_benchmark_incremental_update(model_cache) -> None:
+    model_cache.max_weight = 2**30
+    tokens = random_corpus(50_000, 0)
+    added = random_corpus(10, 1)
+    config = {"vector_size": 100, "window": 5, "min_count": 1, "workers": 1}
+    train_word2vec(tokens, **config)
+
+    start = time.perf_counter()
+    train_word2vec(tokens + added, previous=tokens, **config)
+    incremental = time.perf_counter() - start
+
+    start = time.perf_counter()
+    Word2Vec(tokens + added, **config)
+    full = time.perf_counter() - start
+
+    print(
+        f"\n+{len(added)} sentences on {len(tokens)}: "
+        f"incremental {incremental:.2f} s, full retrain {full:.2f} s"
+    )
@@ -0,0 +1,253 @@
+import os
+import threading
+import time
+import tracemalloc
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+import pytest
+from PIL import Image
+from pytest_mock import MockFixture
+
+from utils.assets import AssetStore, split_asset_refs
+from utils.cache import LRUCache
+from utils.function_call import pets, wordcloud
+
+
+@pytest.fixture
+def fake_ckip(mocker: MockFixture, monkeypatch):
+    """Replace the CKIP drivers with fakes tagging every character as a noun."""
+    monkeypatch.setattr(wordcloud, "_ckip_models", None)
+    monkeypatch.setattr(wordcloud, "word_count_cache", LRUCache())
+
+    def segment(sentences, **kwargs):
+        return [[s[i : i + 2] for i in range(0, len(s), 2)] for s in sentences]
+
+    def tag(sentences, **kwargs):
+        return [["Na" for _ in tokens] for tokens in sentences]
+
+    # Imported by get_ckip_models on first use
+    ws_cls = mocker.patch("ckip_transformers.nlp.CkipWordSegmenter")
+    pos_cls = mocker.patch("ckip_transformers.nlp.CkipPosTagger")
+    ws_cls.return_value.side_effect = segment
+    pos_cls.return_value.side_effect = tag
+    return ws_cls, pos_cls
+
+
+def test_ckip_models_loaded_once(fake_ckip) -> None:
+    ws_cls, pos_cls = fake_ckip
+
+    models = []
+    threads = [
+        threading.Thread(target=lambda: models.append(wordcloud.get_ckip_models()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wordcloud.build_word_freq_dict(["貓咪親人", "貓咪好動"])
+    wordcloud.warm_up_ckip_models()
+
+    ws_cls.assert_called_once()
+    pos_cls.assert_called_once()
+    assert all(m is models[0] for m in models)
+
+
+def test_word_freq_dict(fake_ckip) -> None:
+    assert wordcloud.build_word_freq_dict(["貓咪親人", "貓咪，好動"]) == {
+        "貓咪": 2,
+        "親人": 1,
+        "好動": 1,
+    }
+
+
+def test_split_sentences() -> None:
+    contents = ["貓咪很親人。 會 撒嬌！\n\n", "a" * 5]
+
+    assert list(wordcloud.split_sentences(contents, max_chars=2)) == [
+        "貓咪",
+        "很親",
+        "人",
+        "會撒",
+        "嬌",
+        "aa",
+        "aa",
+        "a",
+    ]
+
+
+def test_word_freq_dict_is_batched(fake_ckip) -> None:
+    ws = fake_ckip[0].return_value
+    # Distinct contents with the same two sentences each
+    contents = ["貓咪親人。狗狗好動。" + "。" * i for i in range(100)]
+
+    word_freq = wordcloud.build_word_freq_dict(contents, batch_size=16)
+
+    assert word_freq == {"貓咪": 100, "親人": 100, "狗狗": 100, "好動": 100}
+    assert ws.call_count == 13
+    assert all(len(call.args[0]) <= 16 for call in ws.call_args_list)
+
+
+def test_overlapping_contents_only_tokenize_new_ones(fake_ckip) -> None:
+    ws = fake_ckip[0].return_value
+
+    wordcloud.build_word_freq_dict(["貓咪親人", "狗狗好動"])
+    assert ws.call_args.args[0] == ["貓咪親人", "狗狗好動"]
+
+    word_freq = wordcloud.build_word_freq_dict(["狗狗好動", "貓咪親人", "兔兔安靜"])
+    assert ws.call_args.args[0] == ["兔兔安靜"]
+    assert word_freq == {
+        "貓咪": 1,
+        "親人": 1,
+        "狗狗": 1,
+        "好動": 1,
+        "兔兔": 1,
+        "安靜": 1,
+    }
+
+    ws.reset_mock()
+    wordcloud.build_word_freq_dict(["貓咪親人"])
+    ws.assert_not_called()
+
+
+def test_content_wordcloud_returns_asset_reference(
+    fake_ckip, mocker: MockFixture, monkeypatch, tmp_path
+) -> None:
+    store = AssetStore(root=str(tmp_path))
+    monkeypatch.setattr(wordcloud, "asset_store", store)
+    monkeypatch.setattr(pets, "asset_store", store)
+    monkeypatch.setattr(wordcloud, "wordcloud_image_cache", LRUCache())
+    render = mocker.patch.object(
+        wordcloud, "render_wordcloud_image", return_value=(b"image", "png")
+    )
+
+    res = pets.content_wordcloud(["貓咪親人。貓咪可愛"])
+    assert res == pets.content_wordcloud(["貓咪親人。貓咪可愛"])
+    render.assert_called_once_with({"貓咪": 2, "親人": 1, "可愛": 1})
+
+    [(alt, key), top_words] = split_asset_refs(res)
+    assert alt == "wordcloud"
+    with open(store.path(key), "rb") as f:
+        assert f.read() == b"image"
+    assert top_words.strip() == "Top words: 貓咪 (2), 親人 (1), 可愛 (1)"
+    assert "base64" not in res
+
+
+def test_asset_store_is_content_addressed(tmp_path) -> None:
+    store = AssetStore(root=str(tmp_path))
+
+    key = store.put(b"image", "webp")
+    assert store.put(b"image", "webp") == key
+    assert store.put(b"other", "webp") != key
+    assert split_asset_refs(f"text\n\n{store.ref(key, 'alt')}\n\nmore") == [
+        "text\n\n",
+        ("alt", key),
+        "\n\nmore",
+    ]
+
+    with pytest.raises(ValueError):
+        store.path("../secrets.toml")
+
+
+def test_asset_store_is_size_bounded(tmp_path) -> None:
+    store = AssetStore(root=str(tmp_path), max_bytes=25)
+
+    first = store.put(b"0" * 10, "png")
+    time.sleep(0.01)
+    second = store.put(b"1" * 10, "png")
+    time.sleep(0.01)
+    # Storing an asset again makes it the most recent
+    store.put(b"0" * 10, "png")
+    time.sleep(0.01)
+    third = store.put(b"2" * 10, "png")
+
+    assert store.exists(first) and store.exists(third)
+    assert not store.exists(second)
+
+    # An asset larger than the cap is still kept until the next one is stored
+    large = store.put(b"3" * 30, "png")
+    assert store.exists(large)
+    assert not store.exists(first) and not store.exists(third)
+
+
+def test_asset_store_tolerates_concurrent_deletes(
+    tmp_path, mocker: MockFixture
+) -> None:
+    store = AssetStore(root=str(tmp_path), max_bytes=25)
+    key = store.put(b"0" * 10, "png")
+
+    def delete_then_utime(path, *args, **kwargs):
+        # Another process evicts the asset between the existence check and the touch
+        os.remove(path)
+        raise FileNotFoundError(path)
+
+    mocker.patch("utils.assets.os.utime", side_effect=delete_then_utime)
+    assert store.put(b"0" * 10, "png") == key
+    assert store.exists(key)
+    mocker.stopall()
+
+    # Another process deletes a scanned asset before it is stat-ed
+    vanished = mocker.Mock()
+    vanished.name = key
+    vanished.stat.side_effect = FileNotFoundError
+    scandir = os.scandir
+    mocker.patch("utils.assets.os.scandir", lambda root: [vanished, *scandir(root)])
+    assert store.exists(store.put(b"1" * 10, "png"))
+
+
+# Latin words, so the WordCloud default font can be used instead of the CJK font
+SAMPLE_WORD_FREQ = {f"word{i}": 150 - i for i in range(150)}
+
+
+@pytest.mark.parametrize("image_format", ["png", "webp"])
+def test_render_wordcloud_image_pil(image_format: str) -> None:
+    data, res_format = wordcloud.render_wordcloud_image(
+        SAMPLE_WORD_FREQ, renderer="pil", image_format=image_format, font_path=None
+    )
+
+    image = Image.open(BytesIO(data))
+    assert res_format == image_format
+    assert image.format == image_format.upper()
+    assert image.size == (
+        wordcloud.WORDCLOUD_MAX_WIDTH,
+        wordcloud.WORDCLOUD_MAX_WIDTH // 2,
+    )
+
+
+def test_render_wordcloud_image_matplotlib_closes_figure() -> None:
+    figures = plt.get_fignums()
+
+    data, res_format = wordcloud.render_wordcloud_image(
+        SAMPLE_WORD_FREQ, renderer="matplotlib", font_path=None
+    )
+
+    assert res_format == "png"
+    assert Image.open(BytesIO(data)).format == "PNG"
+    assert plt.get_fignums() == figures
+
+
+@pytest.mark.performance
+def test_benchmark_wordcloud_encoders() -> None:
+    # The layout is shared; only the rasterization and encoding differ
+    layout = wordcloud.generate_wordcloud(SAMPLE_WORD_FREQ, font_path=None)
+    encoders = {
+        "matplotlib": lambda: wordcloud.encode_wordcloud_figure(layout),
+        "pil png": lambda: wordcloud.encode_wordcloud_image(layout, "png"),
+        "pil webp": lambda: wordcloud.encode_wordcloud_image(layout, "webp"),
+    }
+
+    print()
+    for name, encode in encoders.items():
+        tracemalloc.start()
+        start = time.perf_counter()
+        image = encode()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(
+            f"{name:>10}: {seconds * 1e3:7.1f} ms, peak {peak / 2**20:6.1f} MiB, "
+            f"{len(image) / 2**10:7.1f} KiB"
+        )